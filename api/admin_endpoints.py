@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from auth import require_admin
+from services.load_shedding import instances as load_shedders
+from services.slow_queries import slow_queries
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# The statements over SLOW_QUERY_MS that cost the most, with sampled
+# EXPLAIN (ANALYZE, BUFFERS) plans where one has been taken
+@router.get("/slow_queries")
+def read_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total_ms", pattern="^(total_ms|max_ms|count)$"),
+):
+    return {
+        "threshold_ms": slow_queries.threshold_ms,
+        "statements": slow_queries.worst(limit, sort),
+    }
+
+@router.delete("/slow_queries")
+def clear_slow_queries():
+    slow_queries.clear()
+    return {"message": "Slow query log cleared"}
+
+# The adaptive concurrency limit, queueing delay and requests shed so far,
+# for this worker process
+@router.get("/load")
+def read_load():
+    return [shedder.stats() for shedder in load_shedders]
@@ -0,0 +1,66 @@
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from sqlmodel import Session
+from db import get_session
+from services.catalog_snapshot import catalog_snapshot, catalog_manifest
+from services.catalog_changes import catalog_changes, CHANGES_PAGE_SIZE
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Current content hash of every catalog table. Always revalidated, so clients
+# notice edits; the table URLs it points to never change.
+@router.get("/manifest")
+def read_catalog_manifest(request: Request, session: Session = Depends(get_session)):
+    manifest = catalog_manifest(session)
+    etag = '"' + hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=json.dumps({
+            "tables": {
+                table: {"hash": table_hash, "url": f"/catalog/{table}/{table_hash}.json"}
+                for table, table_hash in manifest.items()
+            }
+        }),
+        media_type="application/json",
+        headers=headers,
+    )
+
+# Only what changed since the client's last sync: a one-row edit sends one
+# row. `since` is the `latest` from the previous response (0 for everything).
+@router.get("/changes")
+def read_catalog_changes(
+    response: Response,
+    since: int = Query(0, ge=0),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=5000),
+    session: Session = Depends(get_session),
+):
+    response.headers["Cache-Control"] = "no-cache"
+    return catalog_changes(session, since, limit)
+
+# A catalog table at a given content hash. Safe to cache forever: new content
+# always gets a new hash, and so a new URL.
+@router.get("/{table}/{content_hash}.json")
+def read_catalog_table(table: str, content_hash: str, session: Session = Depends(get_session)):
+    snapshot = catalog_snapshot(session, table)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Catalog table not found")
+    if snapshot["hash"] != content_hash:
+        # Old hash: send the client to the current version, without caching the redirect
+        return RedirectResponse(
+            f"/catalog/{table}/{snapshot['hash']}.json",
+            status_code=302,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    return Response(
+        content=snapshot["body"],
+        media_type="application/json",
+        headers={"Cache-Control": IMMUTABLE, "ETag": f'"{content_hash}"'},
+    )
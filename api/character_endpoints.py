@@ -0,0 +1,175 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import Session, SQLModel, select
+from db import get_session
+from models import Character, CharacterClass, CharacterHolding, CharacterPayload, HOLDING_LISTS
+from auth import security, check_current_credentials
+from services.encumbrance import get_character_load
+from services.wallet import purchase_item, wallet_summary, PurchaseError
+from services.character_kit import create_character_from_kit
+from services.feat_graph import feat_graph
+from services.progression import ability_scores, base_attack_bonus
+from services.level_up import level_up_character, LevelUpError
+from services.character_events import character_event_stream, load_character_document
+from services.attack_matrix import attack_matrix, parse_ac_range
+from services.defense import character_defense
+from typing import Annotated, List, Optional
+
+router = APIRouter()
+
+class PurchaseRequest(SQLModel):
+    item_type: str  # "Equipment", "Weapon" or "Armor", as listed by /shop_items/
+    item_id: int
+    quantity: int = 1
+
+class LevelUpRequest(SQLModel):
+    feat_ids: List[int] = []
+    spell_ids: List[int] = []
+    hp_roll: Optional[int] = None  # Leave out to take the average for the class's hit die
+
+# Live updates for everyone viewing the character, instead of polling
+# GET /characters/{id}: a snapshot, then a patch whenever it changes
+@router.get("/{character_id}/events")
+async def stream_character_events(character_id: int, request: Request):
+    if await run_in_threadpool(load_character_document, character_id) is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return StreamingResponse(
+        character_event_stream(character_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def check_holding_lists(payload: CharacterPayload, current: dict = None):
+    # The lists may be sent back unchanged (clients that PUT what they GET),
+    # but changing them here would be silently lost, so it's refused
+    for field in HOLDING_LISTS:
+        value = getattr(payload, field)
+        if value is not None and value != (current or {}).get(field, []):
+            raise HTTPException(
+                status_code=422,
+                detail=f"'{field}' can't be changed through /characters; use the character link routes",
+            )
+
+# Total carried weight and load tier, computed in the database
+@router.get("/{character_id}/load")
+def read_character_load(character_id: int, session: Session = Depends(get_session)):
+    load = get_character_load(session, character_id)
+    if load is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return load
+
+@router.get("/{character_id}/wallet")
+def read_character_wallet(character_id: int, session: Session = Depends(get_session)):
+    wallet_copper = session.exec(select(Character.wallet_copper).where(Character.id == character_id)).first()
+    if wallet_copper is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return wallet_summary(character_id, wallet_copper)
+
+# Buy a shop item: debit the wallet and add the item in a single transaction
+@router.post("/{character_id}/purchase")
+def purchase(
+    character_id: int,
+    purchase_request: PurchaseRequest,
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    session: Session = Depends(get_session)
+):
+    payload = check_current_credentials(credentials)
+    user_id = payload["sub"]
+
+    try:
+        return purchase_item(
+            session,
+            character_id,
+            user_id,
+            purchase_request.item_type,
+            purchase_request.item_id,
+            purchase_request.quantity,
+        )
+    except PurchaseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+# Create a character along with its class's starting spells, weapons, armor and inventory
+@router.post("/from_class/{class_id}")
+def create_character_from_class(
+    class_id: int,
+    character_payload: CharacterPayload,
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    session: Session = Depends(get_session)
+):
+    payload = check_current_credentials(credentials)
+    character_class = session.get(CharacterClass, class_id)
+    if not character_class:
+        raise HTTPException(status_code=404, detail="Character Class not found")
+    check_holding_lists(character_payload)
+
+    character = Character(**character_payload.model_dump(exclude=set(HOLDING_LISTS)))
+    character.user_id = payload["sub"]
+    character.character_class_id = class_id
+    return create_character_from_kit(session, character, character_class)
+
+# AC, touch and flat-footed AC, speed and armor check penalties from worn armor
+@router.get("/{character_id}/defense")
+def read_character_defense(character_id: int, session: Session = Depends(get_session)):
+    defense = character_defense(session, character_id)
+    if defense is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return defense
+
+# Hit chance and expected damage per weapon across a range of target ACs
+@router.get("/{character_id}/attack_matrix")
+def read_attack_matrix(character_id: int, ac: str = Query("10..30"), session: Session = Depends(get_session)):
+    try:
+        ac_values = parse_ac_range(ac)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid AC range {ac!r}: {e}")
+    matrix = attack_matrix(session, character_id, ac_values)
+    if matrix is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return matrix
+
+# Feats the character can take next, checked against the precomputed prerequisite graph
+@router.get("/{character_id}/eligible_feats")
+def read_eligible_feats(character_id: int, session: Session = Depends(get_session)):
+    character = session.get(Character, character_id)
+    if not character:
+        raise HTTPException(status_code=404, detail="Character not found")
+
+    character_class = session.get(CharacterClass, character.character_class_id) if character.character_class_id else None
+    class_keys = {character_class.id, (character_class.name or "").strip().lower()} if character_class else set()
+    level = character.level or 1
+    owned = session.exec(
+        select(CharacterHolding.ref_id).where(CharacterHolding.character_id == character_id, CharacterHolding.kind == "feat")
+    ).all()
+
+    graph = feat_graph(session)
+    eligible = graph.eligible(
+        owned,
+        ability_scores(session, character_id),
+        base_attack_bonus(session, character_class, level),
+        level,
+        class_keys,
+    )
+    return graph.feats_for(eligible)
+
+# Advance a character one level, applying HP, feats and spells in one transaction
+@router.post("/{character_id}/level_up")
+def level_up(
+    character_id: int,
+    level_up_request: LevelUpRequest,
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    session: Session = Depends(get_session)
+):
+    payload = check_current_credentials(credentials)
+    try:
+        return level_up_character(
+            session,
+            character_id,
+            payload["sub"],
+            level_up_request.feat_ids,
+            level_up_request.spell_ids,
+            level_up_request.hp_roll,
+        )
+    except LevelUpError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 from db import get_session
 from models import CharacterClass, Character, ClassAbility
-from typing import List, Annotated
+from typing import List, Annotated, Optional
+from services.ability_index import class_abilities
 
 router = APIRouter()
 
@@ -25,6 +26,14 @@ def read_character_class(character_class_id: int, session: Session = Depends(get
         raise HTTPException(status_code=404, detail="Character Class not found")
     return character_class
 
+# Abilities a class gains up to (and including) max_level, lowest level first
+@router.get("/{character_class_id}/abilities")
+def read_character_class_abilities(character_class_id: int, max_level: Optional[int] = None, session: Session = Depends(get_session)):
+    abilities = class_abilities(session, character_class_id, max_level=max_level)
+    if not abilities and not session.get(CharacterClass, character_class_id):
+        raise HTTPException(status_code=404, detail="Character Class not found")
+    return abilities
+
 @router.put("/{character_class_id}", response_model=CharacterClass)
 def update_character_class(character_class_id: int, character_class_update: CharacterClass, session: Session = Depends(get_session)):
     character_class = session.get(CharacterClass, character_class_id)
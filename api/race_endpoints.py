@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from db import get_session
 from models import Race, RacialTrait
 from typing import List
+from services.race_index import race_bundles
 
 router = APIRouter()
 
@@ -25,6 +26,14 @@ def read_race(race_id: int, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Race not found")
     return race
 
+# Race with its starting and learnable languages and its racial traits
+@router.get("/{race_id}/bundle")
+def read_race_bundle(race_id: int, session: Session = Depends(get_session)):
+    bundle = race_bundles(session).get(race_id)
+    if not bundle:
+        raise HTTPException(status_code=404, detail="Race not found")
+    return bundle
+
 @router.put("/{race_id}", response_model=Race)
 def update_race(race_id: int, race_update: Race, session: Session = Depends(get_session)):
     race = session.get(Race, race_id)
@@ -1,16 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from db import get_session
 from models import Spell, Character, CharacterSpellLink
 from typing import List
+from services.catalog_snapshot import catalog_snapshot
 
 router = APIRouter()
 
 # Retrieve all spells
 @router.get("/", response_model=List[Spell])
 def read_all_spells(session: Session = Depends(get_session)):
-    spells = session.exec(select(Spell)).all()
-    return spells
+    # Served from the cached snapshot; concurrent misses share one SELECT
+    return Response(content=catalog_snapshot(session, "spells")["body"], media_type="application/json")
 
 @router.post("/", response_model=Spell)
 def create_spell(spell: Spell, session: Session = Depends(get_session)):
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 from db import get_session
 from models import Weapon, Character, CharacterWeaponLink
+from services.dice import DiceError, weapon_damage_stats
 from typing import List
 
 router = APIRouter()
@@ -26,6 +27,18 @@ def read_weapon(weapon_id: int, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Weapon not found")
     return weapon
 
+# Exact damage distribution (mean, variance, percentiles) per weapon head,
+# with an optional flat bonus such as Strength; cached until weapons change
+@router.get("/{weapon_id}/damage_stats")
+def read_weapon_damage_stats(weapon_id: int, bonus: int = Query(0, ge=-100, le=100), session: Session = Depends(get_session)):
+    try:
+        stats = weapon_damage_stats(session, weapon_id, bonus)
+    except DiceError as e:
+        raise HTTPException(status_code=422, detail=f"Weapon damage can't be read: {e}")
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Weapon not found")
+    return stats
+
 @router.put("/{weapon_id}", response_model=Weapon)
 def update_weapon(weapon_id: int, weapon_update: Weapon, session: Session = Depends(get_session)):
     weapon = session.get(Weapon, weapon_id)
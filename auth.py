@@ -0,0 +1,33 @@
+import jwt
+from typing import Annotated
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from config import SUPABASE_SECRET_KEY, JWT_ALGORITHM, ADMIN_USER_IDS
+
+# Security dependency
+security = HTTPBearer()
+
+def verify_token(token: str):
+    try:
+        payload = jwt.decode(
+            token,
+            SUPABASE_SECRET_KEY,
+            audience=["authenticated"],
+            algorithms=[JWT_ALGORITHM]
+        )
+        return payload
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+def check_current_credentials(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
+    token = credentials.credentials
+    payload = verify_token(token)
+    return payload
+
+def require_admin(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
+    payload = check_current_credentials(credentials)
+    if payload.get("sub") not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admins only")
+    return payload
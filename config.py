@@ -10,4 +10,6 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
 SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 SUPABASE_SECRET_KEY = os.getenv("SUPABASE_SECRET_KEY")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
\ No newline at end of file
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
+# Supabase user ids allowed to use the /admin endpoints, comma separated
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
@@ -1,5 +1,8 @@
 from sqlmodel import create_engine, SQLModel, Session
 from config import DATABASE_URL
+import services.catalog_cache  # registers the cache invalidation hooks on Session
+import services.character_cache
+import services.slow_queries  # times every statement for the slow query log
 
 engine = create_engine(DATABASE_URL, echo=True)
 
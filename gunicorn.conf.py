@@ -0,0 +1,56 @@
+import gc
+import math
+import os
+
+# Gunicorn settings: imports the app once in the master, warms every catalog
+# cache there and then forks the workers, so they start warm and share the
+# cached structures copy-on-write instead of each building its own.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def cpu_limit() -> float:
+    # cgroup v2, then cgroup v1, then whatever the host reports
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return os.cpu_count() or 1
+
+
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or 2 * max(1, math.ceil(cpu_limit())) + 1
+
+
+def when_ready(server):
+    from db import engine
+    from services.warmup import sync_table_versions, warm_catalog_caches
+
+    # Cache under the real table versions, the ones each worker syncs to at
+    # startup; at version 0 every entry would be stale in every worker
+    if sync_table_versions() and warm_catalog_caches():
+        server.log.info("Catalog caches warmed before forking workers")
+    # Don't hand the master's open connections to the workers
+    engine.dispose()
+    # Keep the warmed objects out of future collections so the GC doesn't
+    # touch (and un-share) their pages in every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from db import engine
+
+    engine.dispose(close=False)
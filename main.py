@@ -1,14 +1,28 @@
 import uvicorn
-import jwt
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Annotated
-from fastapi import FastAPI, Depends, HTTPException, Form
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlmodel import Session, select
-from db import get_session
-from models import Character, Armor, CharacterArmorLink, CharacterInventoryLink, CharacterMoneyLink, CharacterSkillLink, Spell, CharacterSpellLink, CharacterStatLink, Weapon, CharacterWeaponLink, Feat, CharacterFeatLink, Equipment, CharacterClass, Race, Stat, Skill, Alignment
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from config import SUPABASE_SECRET_KEY, JWT_ALGORITHM   
+from db import engine, get_session
+from models import Character, CharacterPayload, HOLDING_LISTS, CharacterHolding, Armor, CharacterArmorLink, CharacterInventoryLink, CharacterMoneyLink, CharacterSkillLink, Spell, CharacterSpellLink, CharacterStatLink, Weapon, CharacterWeaponLink, Feat, CharacterFeatLink, Equipment, CharacterClass, Race, Stat, Skill, Alignment
+from fastapi.security import HTTPAuthorizationCredentials
+from auth import security, check_current_credentials
+from services.wallet import gold_to_copper
+from services.warmup import warm_up
+from services.health import monitor_loop_lag, liveness, readiness
+from services.load_shedding import LoadSheddingMiddleware
+from services.slow_queries import QueryContextMiddleware
+from services.catalog_cache import table_version, start_invalidation_listener
+from services.catalog_snapshot import creation_data
+from services.single_flight import flights
+from services.character_cache import character_cache, dump_rows
+from services.character_document import character_section, holding_lists
+from services.table_notifications import table_change_listener
 from api.race_endpoints import router as race_router
 from api.armor_endpoints import router as armor_router
 from api.alignment_endpoints import router as alignment_router
@@ -26,95 +40,51 @@ from api.spell_endpoints import router as spell_router
 from api.weapon_endpoints import router as weapon_router
 from api.class_ability_endpoints import router as ability_router
 from api.racial_trait_endpoints import router as trait_router
+from api.character_endpoints import router as character_router, check_holding_lists
+from api.catalog_endpoints import router as catalog_router
+from api.admin_endpoints import router as admin_router
 # from api.creation_endpoint import router as creation_router
 
-app = FastAPI(redirect_slashes=False)
-
-# app.include_router(creation_router, prefix="/creation", tags=["Character Creation"])
-app.include_router(ability_router, prefix="/class_abilities", tags=["Class Abilities"])
-app.include_router(trait_router, prefix="/racial_traits", tags=["Racial Traits"])
-app.include_router(weapon_router, prefix="/weapons", tags=["Weapons"])
-app.include_router(spell_router, prefix="/spells", tags=["Spells"])
-app.include_router(race_router, prefix="/races", tags=["Races"])
-app.include_router(armor_router, prefix="/armor", tags=["Armor"])
-app.include_router(alignment_router, prefix="/alignments", tags=["Alignments"])
-app.include_router(class_router, prefix="/character_classes", tags=["Classes"])
-app.include_router(bab_router, prefix="/bab_progressions", tags=["Base Attack Bonus"])
-app.include_router(caster_router, prefix="/caster_types", tags=["Caster Types"])
-app.include_router(feat_router, prefix="/feats", tags=["Feats"])
-app.include_router(stat_router, prefix="/stats", tags=["Stats"])
-app.include_router(save_router, prefix="/saving_throw_progressions", tags=["Saves"])
-app.include_router(equipment_router, prefix="/equipment", tags=["Equipment"])
-app.include_router(skill_router, prefix="/skills", tags=["Skills"])
-app.include_router(money_router, prefix="/money_values", tags=["Money"])
-app.include_router(language_router, prefix="/languages", tags=["Languages"])
-
-origins = [
-    'http://localhost',
-    'http://localhost:3000',
-    'http://localhost:5173',
-    'https://pathforger.netlify.app'
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=['*']
-)
-
-@app.get("/")
+router = APIRouter()
+
+@router.get("/")
 def root():
     return {"message": "Hello World"}
 
+# Liveness: the process is up and its event loop isn't blocked
+@router.get("/healthz")
+async def healthz():
+    alive, body = liveness()
+    return JSONResponse(body, status_code=200 if alive else 503)
+
+# Readiness: the database is reachable, migrations are at head and caches are warm
+@router.get("/readyz")
+def readyz():
+    ready, body = readiness()
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 
-# Security dependency
-security = HTTPBearer()
+def build_creation_data():
+    # Its own session: the build is shared by everyone waiting on it, so it
+    # mustn't use (and be cut off by) the session of whichever request started it
+    with Session(engine) as session:
+        return creation_data(session)
 
-def verify_token(token: str):
+@router.get("/character_creation_data/")
+async def get_character_creation_data():
     try:
-        payload = jwt.decode(
-            token,
-            SUPABASE_SECRET_KEY,
-            audience=["authenticated"],
-            algorithms=[JWT_ALGORITHM]
+        # Everyone asking while the data is being (re)built waits for the same
+        # build instead of each running six full-table SELECTs
+        versions = tuple(table_version(table) for table in creation_data.tables)
+        body = await flights.do_async(
+            ("character_creation_data", versions),
+            lambda: run_in_threadpool(build_creation_data),
         )
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-def check_current_credentials(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
-    token = credentials.credentials
-    payload = verify_token(token)
-    return payload
-
-@app.get("/character_creation_data/")
-def get_character_creation_data(session: Session = Depends(get_session)):
-    try:
-        # Fetch data from all necessary tables
-        classes = session.exec(select(CharacterClass)).all()
-        races = session.exec(select(Race)).all()
-        stats = session.exec(select(Stat)).all()
-        skills = session.exec(select(Skill)).all()
-        feats = session.exec(select(Feat)).all()
-        alignments = session.exec(select(Alignment)).all()
-
-        # Consolidate the data into a single response
-        return {
-            "classes": classes,
-            "races": races,
-            "stats": stats,
-            "skills": skills,
-            "feats": feats,
-            "alignments": alignments,
-        }
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/shop_items/", response_model=List[dict])
+@router.get("/shop_items/", response_model=List[dict])
 def get_shop_items(session: Session = Depends(get_session)):
     # Fetch data from each table
     equipment = session.exec(select(Equipment)).all()
@@ -123,32 +93,41 @@ def get_shop_items(session: Session = Depends(get_session)):
 
     # Combine the data into a single list
     combined_items = [
-        {"type": "Equipment", "name": item.name, "gold_value": item.gold_value}
+        {"type": "Equipment", "id": item.id, "name": item.name, "gold_value": item.gold_value, "copper_value": gold_to_copper(item.gold_value)}
         for item in equipment
     ] + [
-        {"type": "Armor", "name": item.name, "gold_value": item.gold_value}
+        {"type": "Armor", "id": item.id, "name": item.name, "gold_value": item.gold_value, "copper_value": gold_to_copper(item.gold_value)}
         for item in armor
     ] + [
-        {"type": "Weapon", "name": item.name, "gold_value": item.gold_value}
+        {"type": "Weapon", "id": item.id, "name": item.name, "gold_value": item.gold_value, "copper_value": gold_to_copper(item.gold_value)}
         for item in weapons
     ]
 
     return combined_items
 
-@app.get("/characters/")
+def with_holding_lists(session: Session, characters: list) -> list:
+    lists = holding_lists(session, [character["id"] for character in characters])
+    return [{**character, **lists[character["id"]]} for character in characters]
+
+@router.get("/characters/")
 def get_characters(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)], session: Session = Depends(get_session)):
     payload = check_current_credentials(credentials)  # Get user info from the token
     user_id = payload["sub"]  # Extract the `sub` from the JWT payload, which is the user's `uid`
 
-    # Query the characters for the authenticated user (user_id)
-    characters = session.exec(select(Character).where(Character.user_id == user_id)).all()
+    # Query the characters for the authenticated user (user_id), cached until one of them changes
+    characters = character_cache.user_characters(
+        session, user_id,
+        lambda session: dump_rows(session.exec(select(Character).where(Character.user_id == user_id)).all()),
+    )
 
-    return characters
+    return with_holding_lists(session, characters)
 
-@app.post("/characters/")
-def create_character(character: Character, credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)], session: Session = Depends(get_session)):
+@router.post("/characters/", response_model=CharacterPayload)
+def create_character(character_payload: CharacterPayload, credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)], session: Session = Depends(get_session)):
     payload = check_current_credentials(credentials)  # Get user info from the token
     user_id = payload["sub"]  # Extract user_id from the token
+    check_holding_lists(character_payload)
+    character = Character(**character_payload.model_dump(exclude=set(HOLDING_LISTS)))
     
     # Assign the user_id to the character
     character.user_id = user_id  # Link the character with the authenticated user
@@ -156,19 +135,19 @@ def create_character(character: Character, credentials: Annotated[HTTPAuthorizat
     session.add(character)
     session.commit()
     session.refresh(character)
-    return character
+    return with_holding_lists(session, [character.model_dump()])[0]
 
-@app.get("/characters/{character_id}", response_model=Character)
+@router.get("/characters/{character_id}", response_model=CharacterPayload)
 def read_character(character_id: int, session: Session = Depends(get_session)):
-    character = session.exec(select(Character).where(Character.id == character_id)).first()
+    character = character_section(session, character_id, "character")
     if not character:
         raise HTTPException(status_code=404, detail="Character not found")
-    return character
+    return with_holding_lists(session, [character])[0]
 
-@app.put("/characters/{character_id}", response_model=Character)
+@router.put("/characters/{character_id}", response_model=CharacterPayload)
 def update_character(
     character_id: int,
-    character_update: Character,  # The updated character data will be provided in the request body
+    character_update: CharacterPayload,  # The updated character data will be provided in the request body
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     session: Session = Depends(get_session)
 ):
@@ -183,17 +162,18 @@ def update_character(
     # Ensure the character belongs to the authenticated user
     if character.user_id != user_id:
         raise HTTPException(status_code=403, detail="You can only update your own characters")
+    check_holding_lists(character_update, holding_lists(session, [character_id])[character_id])
 
     # Update the character's fields
-    for key, value in character_update.dict(exclude_unset=True).items():
+    for key, value in character_update.model_dump(exclude_unset=True, exclude=set(HOLDING_LISTS)).items():
         setattr(character, key, value)
 
     session.commit()
     session.refresh(character)
-    return character
+    return with_holding_lists(session, [character.model_dump()])[0]
 
 
-@app.delete("/characters/{character_id}")
+@router.delete("/characters/{character_id}")
 def delete_character(
     character_id: int,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -217,50 +197,66 @@ def delete_character(
     return {"message": "Character deleted successfully"}
 
 # Retrieve all characters
-@app.get("/characters/", response_model=List[Character])
+@router.get("/characters/", response_model=List[CharacterPayload])
 def read_all_characters(session: Session = Depends(get_session)):
     characters = session.exec(select(Character)).all()
-    return characters
+    return with_holding_lists(session, dump_rows(characters))
 
 
+def update_holding(session: Session, holding: CharacterHolding, link_update, conflict_detail: str):
+    # A PUT body may move a holding to another character or item; refuse to
+    # land it on one that's already held
+    key = holding.key_after(link_update)
+    if key != (holding.character_id, holding.kind, holding.ref_id) and session.get(CharacterHolding, key):
+        raise HTTPException(status_code=409, detail=conflict_detail)
+    holding.update_from(link_update)
+    session.commit()
+    session.refresh(holding)
+    return holding.as_link()
+
 # Create a link between a character and an armor
-@app.post("/character_armors/", response_model=CharacterArmorLink)
+@router.post("/character_armors/", response_model=CharacterArmorLink)
 def create_character_armor_link(character_id: int, armor_id: int, session: Session = Depends(get_session)):
     character = session.get(Character, character_id)
     armor = session.get(Armor, armor_id)
     if not character or not armor:
         raise HTTPException(status_code=404, detail="Character or Armor not found")
 
-    character_armor_link = CharacterArmorLink(character_id=character_id, armor_id=armor_id)
-    session.add(character_armor_link)
+    # Another piece of armor the character already has adds to its quantity
+    holding = session.get(CharacterHolding, (character_id, "armor", armor_id))
+    if holding:
+        holding.quantity = (holding.quantity or 1) + 1
+    else:
+        holding = CharacterHolding.from_link(CharacterArmorLink(character_id=character_id, armor_id=armor_id))
+        session.add(holding)
     session.commit()
-    session.refresh(character_armor_link)
-    return character_armor_link
+    session.refresh(holding)
+    return holding.as_link()
 
 # Get all armor for a specific character
-@app.get("/character_armors/{character_id}", response_model=List[Armor])
+@router.get("/character_armors/{character_id}", response_model=List[Armor])
 def get_armor_for_character(character_id: int, session: Session = Depends(get_session)):
-    armors = session.exec(
-        select(Armor).join(CharacterArmorLink).where(CharacterArmorLink.character_id == character_id)
-    ).all()
+    armors = character_section(session, character_id, "armor")
     return armors
 
 # Update a character’s armor link
-@app.put("/character_armors/{character_armor_link_id}", response_model=CharacterArmorLink)
-def update_character_armor_link(character_armor_link_id: int, new_armor_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterArmorLink, character_armor_link_id)
+@router.put("/character_armors/{character_id}/{armor_id}", response_model=CharacterArmorLink)
+def update_character_armor_link(character_id: int, armor_id: int, new_armor_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "armor", armor_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Armor Link not found")
+    if new_armor_id != armor_id and session.get(CharacterHolding, (character_id, "armor", new_armor_id)):
+        raise HTTPException(status_code=409, detail="Character already has that armor")
     
-    link.armor_id = new_armor_id
+    link.ref_id = new_armor_id
     session.commit()
     session.refresh(link)
-    return link
+    return link.as_link()
 
 # Delete a character’s armor link
-@app.delete("/character_armors/{character_armor_link_id}")
-def delete_character_armor_link(character_armor_link_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterArmorLink, character_armor_link_id)
+@router.delete("/character_armors/{character_id}/{armor_id}")
+def delete_character_armor_link(character_id: int, armor_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "armor", armor_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Armor Link not found")
     
@@ -268,70 +264,72 @@ def delete_character_armor_link(character_armor_link_id: int, session: Session =
     session.commit()
     return {"message": "Character-Armor link deleted successfully"}
 
-@app.put("/character_inventory/{character_id}/{equipment_id}", response_model=CharacterInventoryLink)
+@router.put("/character_inventory/{character_id}/{equipment_id}", response_model=CharacterInventoryLink)
 def update_character_inventory_link(character_id: int, equipment_id: int, inventory_link_update: CharacterInventoryLink, session: Session = Depends(get_session)):
-    inventory_link = session.get(CharacterInventoryLink, (character_id, equipment_id))
+    inventory_link = session.get(CharacterHolding, (character_id, "equipment", equipment_id))
     if not inventory_link:
         raise HTTPException(status_code=404, detail="Inventory link not found")
-    for key, value in inventory_link_update.dict(exclude_unset=True).items():
-        setattr(inventory_link, key, value)
-    session.commit()
-    session.refresh(inventory_link)
-    return inventory_link
+    return update_holding(session, inventory_link, inventory_link_update, "Character already has that item")
 
-@app.delete("/character_inventory/{character_id}/{equipment_id}")
+@router.delete("/character_inventory/{character_id}/{equipment_id}")
 def delete_character_inventory_link(character_id: int, equipment_id: int, session: Session = Depends(get_session)):
-    inventory_link = session.get(CharacterInventoryLink, (character_id, equipment_id))
+    inventory_link = session.get(CharacterHolding, (character_id, "equipment", equipment_id))
     if not inventory_link:
         raise HTTPException(status_code=404, detail="Inventory link not found")
     session.delete(inventory_link)
     session.commit()
     return {"message": "Inventory link deleted successfully"}
 
-@app.post("/character_inventory/", response_model=CharacterInventoryLink)
+@router.post("/character_inventory/", response_model=CharacterInventoryLink)
 def create_character_inventory_link(character_inventory_link: CharacterInventoryLink, session: Session = Depends(get_session)):
-    session.add(character_inventory_link)
+    holding = CharacterHolding.from_link(character_inventory_link)
+    # More of an item the character already has adds to its quantity
+    existing = session.get(CharacterHolding, (holding.character_id, holding.kind, holding.ref_id))
+    if existing:
+        existing.quantity = (existing.quantity or 1) + (holding.quantity or 1)
+        holding = existing
+    else:
+        session.add(holding)
     session.commit()
-    session.refresh(character_inventory_link)
-    return character_inventory_link
+    session.refresh(holding)
+    return holding.as_link()
 
-@app.get("/character_inventory/{character_id}", response_model=List[CharacterInventoryLink])
+@router.get("/character_inventory/{character_id}", response_model=List[CharacterInventoryLink])
 def read_character_inventory_links(character_id: int, session: Session = Depends(get_session)):
-    inventory_links = session.exec(select(CharacterInventoryLink).where(CharacterInventoryLink.character_id == character_id)).all()
+    inventory_links = character_section(session, character_id, "inventory")
     return inventory_links
 
 # Retrieve all character inventory links
-@app.get("/character_inventory/", response_model=List[CharacterInventoryLink])
+@router.get("/character_inventory/", response_model=List[CharacterInventoryLink])
 def read_all_character_inventory(session: Session = Depends(get_session)):
-    character_inventory = session.exec(select(CharacterInventoryLink)).all()
-    return character_inventory
+    character_inventory = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "equipment")).all()
+    return [holding.as_link() for holding in character_inventory]
 
-@app.post("/character_money/", response_model=CharacterMoneyLink)
+@router.post("/character_money/", response_model=CharacterMoneyLink)
 def create_character_money_link(character_money_link: CharacterMoneyLink, session: Session = Depends(get_session)):
-    session.add(character_money_link)
+    holding = CharacterHolding.from_link(character_money_link)
+    if session.get(CharacterHolding, (holding.character_id, holding.kind, holding.ref_id)):
+        raise HTTPException(status_code=409, detail="Character already has that money")
+    session.add(holding)
     session.commit()
-    session.refresh(character_money_link)
-    return character_money_link
+    session.refresh(holding)
+    return holding.as_link()
 
-@app.get("/character_money/{character_id}", response_model=List[CharacterMoneyLink])
+@router.get("/character_money/{character_id}", response_model=List[CharacterMoneyLink])
 def read_character_money_links(character_id: int, session: Session = Depends(get_session)):
-    money_links = session.exec(select(CharacterMoneyLink).where(CharacterMoneyLink.character_id == character_id)).all()
+    money_links = character_section(session, character_id, "money")
     return money_links
 
-@app.put("/character_money/{character_id}/{money_id}", response_model=CharacterMoneyLink)
+@router.put("/character_money/{character_id}/{money_id}", response_model=CharacterMoneyLink)
 def update_character_money_link(character_id: int, money_id: int, money_link_update: CharacterMoneyLink, session: Session = Depends(get_session)):
-    money_link = session.get(CharacterMoneyLink, (character_id, money_id))
+    money_link = session.get(CharacterHolding, (character_id, "money", money_id))
     if not money_link:
         raise HTTPException(status_code=404, detail="Money link not found")
-    for key, value in money_link_update.dict(exclude_unset=True).items():
-        setattr(money_link, key, value)
-    session.commit()
-    session.refresh(money_link)
-    return money_link
+    return update_holding(session, money_link, money_link_update, "Character already has that money")
 
-@app.delete("/character_money/{character_id}/{money_id}")
+@router.delete("/character_money/{character_id}/{money_id}")
 def delete_character_money_link(character_id: int, money_id: int, session: Session = Depends(get_session)):
-    money_link = session.get(CharacterMoneyLink, (character_id, money_id))
+    money_link = session.get(CharacterHolding, (character_id, "money", money_id))
     if not money_link:
         raise HTTPException(status_code=404, detail="Money link not found")
     session.delete(money_link)
@@ -339,39 +337,38 @@ def delete_character_money_link(character_id: int, money_id: int, session: Sessi
     return {"message": "Money link deleted successfully"}
 
 # Retrieve all character money links
-@app.get("/character_money/", response_model=List[CharacterMoneyLink])
+@router.get("/character_money/", response_model=List[CharacterMoneyLink])
 def read_all_character_money(session: Session = Depends(get_session)):
-    character_money = session.exec(select(CharacterMoneyLink)).all()
-    return character_money
+    character_money = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "money")).all()
+    return [holding.as_link() for holding in character_money]
 
 # CRUD for character skill link
 
-@app.post("/character_skills/", response_model=CharacterSkillLink)
+@router.post("/character_skills/", response_model=CharacterSkillLink)
 def create_character_skill_link(character_skill_link: CharacterSkillLink, session: Session = Depends(get_session)):
-    session.add(character_skill_link)
+    holding = CharacterHolding.from_link(character_skill_link)
+    if session.get(CharacterHolding, (holding.character_id, holding.kind, holding.ref_id)):
+        raise HTTPException(status_code=409, detail="Character already has that skill")
+    session.add(holding)
     session.commit()
-    session.refresh(character_skill_link)
-    return character_skill_link
+    session.refresh(holding)
+    return holding.as_link()
 
-@app.get("/character_skills/{character_id}", response_model=List[CharacterSkillLink])
+@router.get("/character_skills/{character_id}", response_model=List[CharacterSkillLink])
 def read_character_skill_links(character_id: int, session: Session = Depends(get_session)):
-    skill_links = session.exec(select(CharacterSkillLink).where(CharacterSkillLink.character_id == character_id)).all()
+    skill_links = character_section(session, character_id, "skills")
     return skill_links
 
-@app.put("/character_skills/{character_id}/{skill_id}", response_model=CharacterSkillLink)
+@router.put("/character_skills/{character_id}/{skill_id}", response_model=CharacterSkillLink)
 def update_character_skill_link(character_id: int, skill_id: int, skill_link_update: CharacterSkillLink, session: Session = Depends(get_session)):
-    skill_link = session.get(CharacterSkillLink, (character_id, skill_id))
+    skill_link = session.get(CharacterHolding, (character_id, "skill", skill_id))
     if not skill_link:
         raise HTTPException(status_code=404, detail="Skill link not found")
-    for key, value in skill_link_update.dict(exclude_unset=True).items():
-        setattr(skill_link, key, value)
-    session.commit()
-    session.refresh(skill_link)
-    return skill_link
+    return update_holding(session, skill_link, skill_link_update, "Character already has that skill")
 
-@app.delete("/character_skills/{character_id}/{skill_id}")
+@router.delete("/character_skills/{character_id}/{skill_id}")
 def delete_character_skill_link(character_id: int, skill_id: int, session: Session = Depends(get_session)):
-    skill_link = session.get(CharacterSkillLink, (character_id, skill_id))
+    skill_link = session.get(CharacterHolding, (character_id, "skill", skill_id))
     if not skill_link:
         raise HTTPException(status_code=404, detail="Skill link not found")
     session.delete(skill_link)
@@ -380,13 +377,13 @@ def delete_character_skill_link(character_id: int, skill_id: int, session: Sessi
 
 
 # Retrieve all character skills links
-@app.get("/character_skills/", response_model=List[CharacterSkillLink])
+@router.get("/character_skills/", response_model=List[CharacterSkillLink])
 def read_all_character_skills(session: Session = Depends(get_session)):
-    character_skills = session.exec(select(CharacterSkillLink)).all()
-    return character_skills
+    character_skills = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "skill")).all()
+    return [holding.as_link() for holding in character_skills]
 
 # Create a link between a character and a spell
-@app.post("/character_spells/", response_model=CharacterSpellLink)
+@router.post("/character_spells/", response_model=CharacterSpellLink)
 def create_character_spell_link(character_id: int, spell_id: int, session: Session = Depends(get_session)):
     # Verify both character and spell exist
     character = session.get(Character, character_id)
@@ -394,47 +391,49 @@ def create_character_spell_link(character_id: int, spell_id: int, session: Sessi
     if not character or not spell:
         raise HTTPException(status_code=404, detail="Character or Spell not found")
     
+    if session.get(CharacterHolding, (character_id, "spell", spell_id)):
+        raise HTTPException(status_code=409, detail="Character already has that spell")
+
     # Create the link
-    character_spell_link = CharacterSpellLink(character_id=character_id, spell_id=spell_id)
-    session.add(character_spell_link)
+    holding = CharacterHolding.from_link(CharacterSpellLink(character_id=character_id, spell_id=spell_id))
+    session.add(holding)
     session.commit()
-    session.refresh(character_spell_link)
-    return character_spell_link
+    session.refresh(holding)
+    return holding.as_link()
 
 # Get all spells for a specific character
-@app.get("/character_spells/{character_id}", response_model=List[Spell])
+@router.get("/character_spells/{character_id}", response_model=List[Spell])
 def get_spells_for_character(character_id: int, session: Session = Depends(get_session)):
-    character = session.get(Character, character_id)
-    if not character:
+    if not character_section(session, character_id, "character"):
         raise HTTPException(status_code=404, detail="Character not found")
-    
-    # Query to retrieve all spells linked to this character
-    spells = session.exec(
-        select(Spell).join(CharacterSpellLink).where(CharacterSpellLink.character_id == character_id)
-    ).all()
+
+    # All spells linked to this character
+    spells = character_section(session, character_id, "spells")
     return spells
 
 # Update a character's spell link (changing a spell for a character)
-@app.put("/character_spells/{character_spell_link_id}", response_model=CharacterSpellLink)
-def update_character_spell_link(character_spell_link_id: int, new_spell_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterSpellLink, character_spell_link_id)
+@router.put("/character_spells/{character_id}/{spell_id}", response_model=CharacterSpellLink)
+def update_character_spell_link(character_id: int, spell_id: int, new_spell_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "spell", spell_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Spell Link not found")
     
     new_spell = session.get(Spell, new_spell_id)
     if not new_spell:
         raise HTTPException(status_code=404, detail="New Spell not found")
+    if new_spell_id != spell_id and session.get(CharacterHolding, (character_id, "spell", new_spell_id)):
+        raise HTTPException(status_code=409, detail="Character already has that spell")
 
     # Update the link
-    link.spell_id = new_spell_id
+    link.ref_id = new_spell_id
     session.commit()
     session.refresh(link)
-    return link
+    return link.as_link()
 
 # Delete a character's spell link
-@app.delete("/character_spells/{character_spell_link_id}")
-def delete_character_spell_link(character_spell_link_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterSpellLink, character_spell_link_id)
+@router.delete("/character_spells/{character_id}/{spell_id}")
+def delete_character_spell_link(character_id: int, spell_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "spell", spell_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Spell Link not found")
     
@@ -443,37 +442,36 @@ def delete_character_spell_link(character_spell_link_id: int, session: Session =
     return {"message": "Character-Spell link deleted successfully"}
 
 # Retrieve all character spells
-@app.get("/character_spells/", response_model=List[CharacterSpellLink])
+@router.get("/character_spells/", response_model=List[CharacterSpellLink])
 def read_all_character_spells(session: Session = Depends(get_session)):
-    character_spells = session.exec(select(CharacterSpellLink)).all()
-    return character_spells
+    character_spells = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "spell")).all()
+    return [holding.as_link() for holding in character_spells]
 
-@app.post("/character_stats/", response_model=CharacterStatLink)
+@router.post("/character_stats/", response_model=CharacterStatLink)
 def create_character_stat_link(character_stat_link: CharacterStatLink, session: Session = Depends(get_session)):
-    session.add(character_stat_link)
+    holding = CharacterHolding.from_link(character_stat_link)
+    if session.get(CharacterHolding, (holding.character_id, holding.kind, holding.ref_id)):
+        raise HTTPException(status_code=409, detail="Character already has that stat")
+    session.add(holding)
     session.commit()
-    session.refresh(character_stat_link)
-    return character_stat_link
+    session.refresh(holding)
+    return holding.as_link()
 
-@app.get("/character_stats/{character_id}", response_model=List[CharacterStatLink])
+@router.get("/character_stats/{character_id}", response_model=List[CharacterStatLink])
 def read_character_stat_links(character_id: int, session: Session = Depends(get_session)):
-    stat_links = session.exec(select(CharacterStatLink).where(CharacterStatLink.character_id == character_id)).all()
+    stat_links = character_section(session, character_id, "stats")
     return stat_links
 
-@app.put("/character_stats/{character_id}/{stat_id}", response_model=CharacterStatLink)
+@router.put("/character_stats/{character_id}/{stat_id}", response_model=CharacterStatLink)
 def update_character_stat_link(character_id: int, stat_id: int, stat_link_update: CharacterStatLink, session: Session = Depends(get_session)):
-    stat_link = session.get(CharacterStatLink, (character_id, stat_id))
+    stat_link = session.get(CharacterHolding, (character_id, "stat", stat_id))
     if not stat_link:
         raise HTTPException(status_code=404, detail="Stat link not found")
-    for key, value in stat_link_update.dict(exclude_unset=True).items():
-        setattr(stat_link, key, value)
-    session.commit()
-    session.refresh(stat_link)
-    return stat_link
+    return update_holding(session, stat_link, stat_link_update, "Character already has that stat")
 
-@app.delete("/character_stats/{character_id}/{stat_id}")
+@router.delete("/character_stats/{character_id}/{stat_id}")
 def delete_character_stat_link(character_id: int, stat_id: int, session: Session = Depends(get_session)):
-    stat_link = session.get(CharacterStatLink, (character_id, stat_id))
+    stat_link = session.get(CharacterHolding, (character_id, "stat", stat_id))
     if not stat_link:
         raise HTTPException(status_code=404, detail="Stat link not found")
     session.delete(stat_link)
@@ -481,49 +479,54 @@ def delete_character_stat_link(character_id: int, stat_id: int, session: Session
     return {"message": "Stat link deleted successfully"}
 
 # Retrieve all character stats links
-@app.get("/character_stats/", response_model=List[CharacterStatLink])
+@router.get("/character_stats/", response_model=List[CharacterStatLink])
 def read_all_character_stats(session: Session = Depends(get_session)):
-    character_stats = session.exec(select(CharacterStatLink)).all()
-    return character_stats
+    character_stats = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "stat")).all()
+    return [holding.as_link() for holding in character_stats]
 
 # Create a link between a character and a weapon
-@app.post("/character_weapons/", response_model=CharacterWeaponLink)
+@router.post("/character_weapons/", response_model=CharacterWeaponLink)
 def create_character_weapon_link(character_id: int, weapon_id: int, session: Session = Depends(get_session)):
     character = session.get(Character, character_id)
     weapon = session.get(Weapon, weapon_id)
     if not character or not weapon:
         raise HTTPException(status_code=404, detail="Character or Weapon not found")
 
-    character_weapon_link = CharacterWeaponLink(character_id=character_id, weapon_id=weapon_id)
-    session.add(character_weapon_link)
+    # Another of a weapon the character already has adds to its quantity
+    holding = session.get(CharacterHolding, (character_id, "weapon", weapon_id))
+    if holding:
+        holding.quantity = (holding.quantity or 1) + 1
+    else:
+        holding = CharacterHolding.from_link(CharacterWeaponLink(character_id=character_id, weapon_id=weapon_id))
+        session.add(holding)
     session.commit()
-    session.refresh(character_weapon_link)
-    return character_weapon_link
+    session.refresh(holding)
+    return holding.as_link()
 
 # Get all weapons for a specific character
-@app.get("/character_weapons/{character_id}", response_model=List[Weapon])
+@router.get("/character_weapons/{character_id}", response_model=List[Weapon])
 def get_weapons_for_character(character_id: int, session: Session = Depends(get_session)):
-    weapons = session.exec(
-        select(Weapon).join(CharacterWeaponLink).where(CharacterWeaponLink.character_id == character_id)
-    ).all()
+    weapons = character_section(session, character_id, "weapons")
     return weapons
 
 # Update a character’s weapon link
-@app.put("/character_weapons/{character_weapon_link_id}", response_model=CharacterWeaponLink)
-def update_character_weapon_link(character_weapon_link_id: int, new_weapon_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterWeaponLink, character_weapon_link_id)
+@router.put("/character_weapons/{character_id}/{weapon_id}", response_model=CharacterWeaponLink)
+def update_character_weapon_link(character_id: int, weapon_id: int, new_weapon_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "weapon", weapon_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Weapon Link not found")
+    if new_weapon_id != weapon_id and session.get(CharacterHolding, (character_id, "weapon", new_weapon_id)):
+        raise HTTPException(status_code=409, detail="Character already has that weapon")
     
-    link.weapon_id = new_weapon_id
+    link.ref_id = new_weapon_id
     session.commit()
     session.refresh(link)
-    return link
+    return link.as_link()
 
 # Delete a character’s weapon link
-@app.delete("/character_weapons/{character_weapon_link_id}")
-def delete_character_weapon_link(character_weapon_link_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterWeaponLink, character_weapon_link_id)
+@router.delete("/character_weapons/{character_id}/{weapon_id}")
+def delete_character_weapon_link(character_id: int, weapon_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "weapon", weapon_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Weapon Link not found")
     
@@ -532,49 +535,52 @@ def delete_character_weapon_link(character_weapon_link_id: int, session: Session
     return {"message": "Character-Weapon link deleted successfully"}
 
 # Retrieve all character weapons
-@app.get("/character_weapons/", response_model=List[CharacterWeaponLink])
+@router.get("/character_weapons/", response_model=List[CharacterWeaponLink])
 def read_all_character_weapons(session: Session = Depends(get_session)):
-    character_weapons = session.exec(select(CharacterWeaponLink)).all()
-    return character_weapons
+    character_weapons = session.exec(select(CharacterHolding).where(CharacterHolding.kind == "weapon")).all()
+    return [holding.as_link() for holding in character_weapons]
 
 # Create a link between a character and a feat
-@app.post("/character_feats/", response_model=CharacterFeatLink)
+@router.post("/character_feats/", response_model=CharacterFeatLink)
 def create_character_feat_link(character_id: int, feat_id: int, session: Session = Depends(get_session)):
     character = session.get(Character, character_id)
     feat = session.get(Feat, feat_id)
     if not character or not feat:
         raise HTTPException(status_code=404, detail="Character or Feat not found")
 
-    character_feat_link = CharacterFeatLink(character_id=character_id, feat_id=feat_id)
-    session.add(character_feat_link)
+    if session.get(CharacterHolding, (character_id, "feat", feat_id)):
+        raise HTTPException(status_code=409, detail="Character already has that feat")
+
+    holding = CharacterHolding.from_link(CharacterFeatLink(character_id=character_id, feat_id=feat_id))
+    session.add(holding)
     session.commit()
-    session.refresh(character_feat_link)
-    return character_feat_link
+    session.refresh(holding)
+    return holding.as_link()
 
 # Get all feats for a specific character
-@app.get("/character_feats/{character_id}", response_model=List[Feat])
+@router.get("/character_feats/{character_id}", response_model=List[Feat])
 def get_feats_for_character(character_id: int, session: Session = Depends(get_session)):
-    feats = session.exec(
-        select(Feat).join(CharacterFeatLink).where(CharacterFeatLink.character_id == character_id)
-    ).all()
+    feats = character_section(session, character_id, "feats")
     return feats
 
 # Update a character’s feat link
-@app.put("/character_feats/{character_feat_link_id}", response_model=CharacterFeatLink)
-def update_character_feat_link(character_feat_link_id: int, new_feat_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterFeatLink, character_feat_link_id)
+@router.put("/character_feats/{character_id}/{feat_id}", response_model=CharacterFeatLink)
+def update_character_feat_link(character_id: int, feat_id: int, new_feat_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "feat", feat_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Feat Link not found")
+    if new_feat_id != feat_id and session.get(CharacterHolding, (character_id, "feat", new_feat_id)):
+        raise HTTPException(status_code=409, detail="Character already has that feat")
     
-    link.feat_id = new_feat_id
+    link.ref_id = new_feat_id
     session.commit()
     session.refresh(link)
-    return link
+    return link.as_link()
 
 # Delete a character’s feat link
-@app.delete("/character_feats/{character_feat_link_id}")
-def delete_character_feat_link(character_feat_link_id: int, session: Session = Depends(get_session)):
-    link = session.get(CharacterFeatLink, character_feat_link_id)
+@router.delete("/character_feats/{character_id}/{feat_id}")
+def delete_character_feat_link(character_id: int, feat_id: int, session: Session = Depends(get_session)):
+    link = session.get(CharacterHolding, (character_id, "feat", feat_id))
     if not link:
         raise HTTPException(status_code=404, detail="Character-Feat Link not found")
     
@@ -582,5 +588,69 @@ def delete_character_feat_link(character_feat_link_id: int, session: Session = D
     session.commit()
     return {"message": "Character-Feat link deleted successfully"}
 
+# Open pooled connections, compile the hot queries, build the catalog caches
+# and the OpenAPI schema before the server starts taking requests
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warm_up, app)
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    stop_listening = start_invalidation_listener()
+    table_change_listener.start()
+    yield
+    table_change_listener.stop()
+    stop_listening()
+    lag_monitor.cancel()
+
+def create_app() -> FastAPI:
+    app = FastAPI(redirect_slashes=False, lifespan=lifespan)
+
+    # app.include_router(creation_router, prefix="/creation", tags=["Character Creation"])
+    app.include_router(ability_router, prefix="/class_abilities", tags=["Class Abilities"])
+    app.include_router(trait_router, prefix="/racial_traits", tags=["Racial Traits"])
+    app.include_router(weapon_router, prefix="/weapons", tags=["Weapons"])
+    app.include_router(spell_router, prefix="/spells", tags=["Spells"])
+    app.include_router(race_router, prefix="/races", tags=["Races"])
+    app.include_router(armor_router, prefix="/armor", tags=["Armor"])
+    app.include_router(alignment_router, prefix="/alignments", tags=["Alignments"])
+    app.include_router(class_router, prefix="/character_classes", tags=["Classes"])
+    app.include_router(bab_router, prefix="/bab_progressions", tags=["Base Attack Bonus"])
+    app.include_router(caster_router, prefix="/caster_types", tags=["Caster Types"])
+    app.include_router(feat_router, prefix="/feats", tags=["Feats"])
+    app.include_router(stat_router, prefix="/stats", tags=["Stats"])
+    app.include_router(save_router, prefix="/saving_throw_progressions", tags=["Saves"])
+    app.include_router(equipment_router, prefix="/equipment", tags=["Equipment"])
+    app.include_router(skill_router, prefix="/skills", tags=["Skills"])
+    app.include_router(money_router, prefix="/money_values", tags=["Money"])
+    app.include_router(language_router, prefix="/languages", tags=["Languages"])
+    app.include_router(character_router, prefix="/characters", tags=["Characters"])
+    app.include_router(catalog_router, prefix="/catalog", tags=["Catalog"])
+    app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+
+    origins = [
+        'http://localhost',
+        'http://localhost:3000',
+        'http://localhost:5173',
+        'https://pathforger.netlify.app'
+    ]
+
+    app.add_middleware(QueryContextMiddleware)
+    # Sheds load before any other work is done for the request
+    app.add_middleware(LoadSheddingMiddleware)
+    # Added last so it wraps everything else, and the shedder's 503s carry
+    # CORS headers the browser will let the frontend read
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=['*']
+    )
+
+    # Character and link routes defined in this module
+    app.include_router(router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="localhost", port=8000, reload=True)
@@ -0,0 +1,28 @@
+"""Linked racial traits to races
+
+Revision ID: 2a9e7f0c4d61
+Revises: b83e4a7c15d2
+Create Date: 2026-10-19 10:41:55.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '2a9e7f0c4d61'
+down_revision: Union[str, None] = 'b83e4a7c15d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('racial_traits', sa.Column('race_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('racial_traits_race_id_fkey', 'racial_traits', 'races', ['race_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('racial_traits_race_id_fkey', 'racial_traits', type_='foreignkey')
+    op.drop_column('racial_traits', 'race_id')
@@ -0,0 +1,245 @@
+"""Unified character holdings
+
+Revision ID: 2d7f4b8e6a13
+Revises: 9e4a6c1d3b58
+Create Date: 2026-10-19 23:41:07.512338
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7f4b8e6a13'
+down_revision: Union[str, None] = '9e4a6c1d3b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Holding kind -> (link table it replaces, item column there, catalog table,
+# JSONB column on characters that duplicated it, extra columns carried over)
+KINDS = {
+    'feat': ('characterfeatlink', 'feat_id', 'feats', 'feats', []),
+    'spell': ('characterspelllink', 'spell_id', 'spells', 'spells', []),
+    'stat': ('characterstatlink', 'stat_id', 'stats', 'stats', ['value']),
+    'skill': ('characterskilllink', 'skill_id', 'skills', 'skills', ['ranks']),
+    'weapon': ('characterweaponlink', 'weapon_id', 'weapons', 'weapons', ['quantity']),
+    'armor': ('characterarmorlink', 'armor_id', 'armor', 'armor', ['quantity', 'equipped']),
+    'equipment': ('characterinventorylink', 'equipment_id', 'equipment', 'inventory_items', ['quantity', 'container_id']),
+    'money': ('charactermoneylink', 'money_id', 'money_values', 'money', []),
+}
+
+# Types of the carried columns, for rebuilding the link tables
+LINK_COLUMN_TYPES = {
+    'value': sa.Integer,
+    'ranks': sa.Integer,
+    'quantity': sa.Integer,
+    'equipped': sa.Boolean,
+    'container_id': sa.Integer,
+}
+
+# Catalog tables whose rows can be matched by name in the JSONB lists
+NAMED_CATALOGS = {'feats', 'spells', 'stats', 'skills', 'weapons', 'armor', 'equipment'}
+
+
+def _json_integer(field: str) -> str:
+    return f"CASE WHEN e->>'{field}' ~ '^-?[0-9]+$' THEN (e->>'{field}')::int END"
+
+
+# How entries in a JSONB list fold into one holding, for each carried column
+JSON_AGGREGATES = {
+    'quantity': f"SUM(COALESCE({_json_integer('quantity')}, 1))",
+    'equipped': "COALESCE(BOOL_OR(CASE WHEN jsonb_typeof(e->'equipped') = 'boolean' THEN (e->>'equipped')::boolean END), false)",
+    'ranks': f"MAX({_json_integer('ranks')})",
+    'value': f"MAX({_json_integer('value')})",
+    'container_id': 'NULL::int',
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'characterholdings',
+        sa.Column('character_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('ref_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('equipped', sa.Boolean(), nullable=True),
+        sa.Column('ranks', sa.Integer(), nullable=True),
+        sa.Column('value', sa.Integer(), nullable=True),
+        sa.Column('container_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['container_id'], ['equipment.id']),
+        sa.PrimaryKeyConstraint('character_id', 'kind', 'ref_id'),
+    )
+    op.create_index('ix_characterholdings_kind_ref_id_character_id', 'characterholdings', ['kind', 'ref_id', 'character_id'], unique=False)
+
+    # JSONB entries that name nothing in the catalog (custom or misspelled
+    # items) are kept here rather than lost with their columns, and put back
+    # if this is downgraded
+    op.create_table(
+        'unmatched_character_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('character_id', sa.Integer(), nullable=False),
+        sa.Column('source_column', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        # Place in the list, or null when the whole column wasn't a list
+        sa.Column('position', sa.Integer(), nullable=True),
+        sa.Column('entry', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # The link tables are authoritative; the JSONB lists only add what they're missing
+    for kind, (table, item, catalog, json_column, columns) in KINDS.items():
+        column_list = ''.join(f', {column}' for column in columns)
+        op.execute(f"""
+            INSERT INTO characterholdings (character_id, kind, ref_id{column_list})
+            SELECT character_id, '{kind}', {item}{column_list} FROM {table}
+        """)
+
+        # Entries may be ids, names, or objects with an id (or item column) and name
+        entry = f"CASE jsonb_typeof(e) WHEN 'object' THEN COALESCE(e->>'{item}', e->>'id') ELSE e #>> '{{}}' END"
+        match = f"t.id::text = {entry}"
+        if catalog in NAMED_CATALOGS:
+            match += f" OR lower(t.name) = lower(CASE jsonb_typeof(e) WHEN 'object' THEN e->>'name' ELSE e #>> '{{}}' END)"
+        aggregates = ''.join(f', {JSON_AGGREGATES[column]}' for column in columns)
+        op.execute(f"""
+            INSERT INTO characterholdings (character_id, kind, ref_id{column_list})
+            SELECT c.id, '{kind}', t.id{aggregates}
+            FROM characters c
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE jsonb_typeof(c.{json_column}) WHEN 'array' THEN c.{json_column} ELSE '[]'::jsonb END
+            ) e
+            JOIN {catalog} t ON {match}
+            GROUP BY c.id, t.id
+            ON CONFLICT (character_id, kind, ref_id) DO NOTHING
+        """)
+        op.execute(f"""
+            INSERT INTO unmatched_character_entries (character_id, source_column, position, entry)
+            SELECT c.id, '{json_column}', p, e
+            FROM characters c
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE jsonb_typeof(c.{json_column}) WHEN 'array' THEN c.{json_column} ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS elements(e, p)
+            WHERE NOT EXISTS (SELECT 1 FROM {catalog} t WHERE {match})
+            UNION ALL
+            SELECT id, '{json_column}', NULL, {json_column}
+            FROM characters
+            WHERE jsonb_typeof({json_column}) NOT IN ('array', 'null')
+        """)
+
+    if not context.is_offline_mode():
+        unmatched = op.get_bind().execute(sa.text(
+            "SELECT source_column, count(*) FROM unmatched_character_entries GROUP BY source_column ORDER BY source_column"
+        )).all()
+        for column, count in unmatched:
+            logger.warning("%s JSONB entries in characters.%s match no catalog row; kept in unmatched_character_entries", count, column)
+
+    for kind, (table, item, catalog, json_column, columns) in KINDS.items():
+        op.drop_table(table)
+        op.drop_column('characters', json_column)
+
+    # ref_id can't have a foreign key, since it points into a different table
+    # for each kind. These triggers keep the guarantees the link tables' keys
+    # gave: a holding must name an existing catalog row, and a catalog row
+    # can't be deleted while it's held.
+    kind_tables = ' '.join(f"WHEN '{kind}' THEN '{catalog}'" for kind, (_, _, catalog, _, _) in KINDS.items())
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION check_holding_ref() RETURNS trigger AS $$
+        DECLARE
+            catalog text := CASE NEW.kind {kind_tables} END;
+            found integer;
+        BEGIN
+            IF catalog IS NULL THEN
+                RAISE EXCEPTION 'Unknown holding kind %', NEW.kind USING ERRCODE = 'check_violation';
+            END IF;
+            EXECUTE format('SELECT 1 FROM %I WHERE id = $1 FOR KEY SHARE', catalog) USING NEW.ref_id;
+            GET DIAGNOSTICS found = ROW_COUNT;
+            IF found = 0 THEN
+                RAISE EXCEPTION 'No % with id %', catalog, NEW.ref_id USING ERRCODE = 'foreign_key_violation';
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER characterholdings_ref_check
+        BEFORE INSERT OR UPDATE OF kind, ref_id ON characterholdings
+        FOR EACH ROW EXECUTE FUNCTION check_holding_ref()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION restrict_held_catalog_delete() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM characterholdings WHERE kind = TG_ARGV[0] AND ref_id = OLD.id) THEN
+                RAISE EXCEPTION '% % is still held by a character', TG_TABLE_NAME, OLD.id USING ERRCODE = 'foreign_key_violation';
+            END IF;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for kind, (_, _, catalog, _, _) in KINDS.items():
+        op.execute(f"""
+            CREATE TRIGGER {catalog}_held_check
+            BEFORE DELETE ON {catalog}
+            FOR EACH ROW EXECUTE FUNCTION restrict_held_catalog_delete('{kind}')
+        """)
+    op.execute("""
+        CREATE TRIGGER characterholdings_changed
+        AFTER INSERT OR UPDATE OR DELETE ON characterholdings
+        FOR EACH ROW EXECUTE FUNCTION notify_character_change()
+    """)
+
+
+def downgrade() -> None:
+    # The JSONB columns come back holding only the entries that couldn't be
+    # matched; everything else is in the link tables
+    for kind, (table, item, catalog, json_column, columns) in KINDS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {catalog}_held_check ON {catalog}")
+        op.add_column('characters', sa.Column(json_column, postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+        op.create_table(
+            table,
+            sa.Column('character_id', sa.Integer(), nullable=False),
+            sa.Column(item, sa.Integer(), nullable=False),
+            *(sa.Column(column, LINK_COLUMN_TYPES[column](), nullable=True) for column in columns),
+            sa.ForeignKeyConstraint(['character_id'], ['characters.id']),
+            sa.ForeignKeyConstraint([item], [f'{catalog}.id']),
+            *([sa.ForeignKeyConstraint(['container_id'], ['equipment.id'])] if 'container_id' in columns else []),
+            sa.PrimaryKeyConstraint('character_id', item),
+        )
+        op.create_index(f'ix_{table}_{item}_character_id', table, [item, 'character_id'], unique=False)
+        column_list = ''.join(f', {column}' for column in columns)
+        op.execute(f"""
+            INSERT INTO {table} (character_id, {item}{column_list})
+            SELECT character_id, ref_id{column_list} FROM characterholdings WHERE kind = '{kind}'
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_changed
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_character_change()
+        """)
+        op.execute(f"""
+            UPDATE characters c SET {json_column} = u.entries
+            FROM (
+                SELECT character_id, jsonb_agg(entry ORDER BY position) AS entries
+                FROM unmatched_character_entries
+                WHERE source_column = '{json_column}' AND position IS NOT NULL
+                GROUP BY character_id
+            ) u
+            WHERE c.id = u.character_id
+        """)
+        # A whole column that wasn't a list goes back as it was
+        op.execute(f"""
+            UPDATE characters c SET {json_column} = u.entry
+            FROM unmatched_character_entries u
+            WHERE u.source_column = '{json_column}' AND u.character_id = c.id AND u.position IS NULL
+        """)
+
+    op.drop_table('unmatched_character_entries')
+    op.drop_index('ix_characterholdings_kind_ref_id_character_id', table_name='characterholdings')
+    op.drop_table('characterholdings')
+    op.execute("DROP FUNCTION IF EXISTS restrict_held_catalog_delete()")
+    op.execute("DROP FUNCTION IF EXISTS check_holding_ref()")
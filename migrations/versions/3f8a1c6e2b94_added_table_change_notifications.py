@@ -0,0 +1,76 @@
+"""Added table change notifications
+
+Revision ID: 3f8a1c6e2b94
+Revises: e5f92a6d0c37
+Create Date: 2026-10-19 17:20:41.527104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a1c6e2b94'
+down_revision: Union[str, None] = 'e5f92a6d0c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The catalog tables the app caches. Any statement that changes one bumps its
+# version and sends a NOTIFY on 'table_changes', which Postgres delivers when
+# (and only if) the transaction commits - including edits made outside the app.
+CATALOG_TABLES = [
+    'alignments',
+    'armor',
+    'bab_progressions',
+    'caster_types',
+    'character_classes',
+    'class_abilities',
+    'equipment',
+    'feats',
+    'languages',
+    'money_values',
+    'races',
+    'racial_traits',
+    'saving_throw_progressions',
+    'skills',
+    'spells',
+    'stats',
+    'weapons',
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        DECLARE
+            new_version bigint;
+        BEGIN
+            INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1
+            RETURNING version INTO new_version;
+            PERFORM pg_notify('table_changes', json_build_object('table', TG_TABLE_NAME, 'version', new_version)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in CATALOG_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+
+def downgrade() -> None:
+    for table in CATALOG_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table('table_versions')
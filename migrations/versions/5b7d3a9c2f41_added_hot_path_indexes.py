@@ -0,0 +1,53 @@
+"""Added hot path indexes
+
+Revision ID: 5b7d3a9c2f41
+Revises: c61e4d9b3f27
+Create Date: 2026-10-19 21:12:07.448310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d3a9c2f41'
+down_revision: Union[str, None] = 'c61e4d9b3f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every per-character listing filters on character_id, but the link tables'
+# primary keys lead with id, so none of those lookups could use them
+LINK_TABLES = [
+    'characterfeatlink',
+    'characterspelllink',
+    'characterstatlink',
+    'characterskilllink',
+    'characterweaponlink',
+    'characterarmorlink',
+    'characterinventorylink',
+    'charactermoneylink',
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, and doesn't
+    # block writes to the table while the index is built
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_characters_user_id'), 'characters', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for table in LINK_TABLES:
+            op.create_index(op.f(f'ix_{table}_character_id'), table, ['character_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_spells_level_school', 'spells', ['spell_level', 'school'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # jsonb_path_ops: smaller and faster than the default opclass, and
+        # containment (class_lists @> '["Wizard"]') is the only lookup we need
+        op.create_index('ix_spells_class_lists', 'spells', ['class_lists'], unique=False, postgresql_using='gin', postgresql_ops={'class_lists': 'jsonb_path_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_spells_class_lists', table_name='spells', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_spells_level_school', table_name='spells', postgresql_concurrently=True, if_exists=True)
+        for table in LINK_TABLES:
+            op.drop_index(op.f(f'ix_{table}_character_id'), table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_characters_user_id'), table_name='characters', postgresql_concurrently=True, if_exists=True)
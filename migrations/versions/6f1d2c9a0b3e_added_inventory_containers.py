@@ -0,0 +1,28 @@
+"""Added inventory containers
+
+Revision ID: 6f1d2c9a0b3e
+Revises: ead21e6ade9b
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1d2c9a0b3e'
+down_revision: Union[str, None] = 'ead21e6ade9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('characterinventorylink', sa.Column('container_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('characterinventorylink_container_id_fkey', 'characterinventorylink', 'equipment', ['container_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('characterinventorylink_container_id_fkey', 'characterinventorylink', type_='foreignkey')
+    op.drop_column('characterinventorylink', 'container_id')
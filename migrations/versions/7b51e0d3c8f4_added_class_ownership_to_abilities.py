@@ -0,0 +1,30 @@
+"""Added class ownership to abilities
+
+Revision ID: 7b51e0d3c8f4
+Revises: d4c07b2e9a18
+Create Date: 2026-10-19 11:58:31.092755
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '7b51e0d3c8f4'
+down_revision: Union[str, None] = 'd4c07b2e9a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('class_abilities', sa.Column('character_class_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('class_abilities_character_class_id_fkey', 'class_abilities', 'character_classes', ['character_class_id'], ['id'])
+    op.create_index('ix_class_abilities_class_level', 'class_abilities', ['character_class_id', 'level_requirement'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_class_abilities_class_level', table_name='class_abilities')
+    op.drop_constraint('class_abilities_character_class_id_fkey', 'class_abilities', type_='foreignkey')
+    op.drop_column('class_abilities', 'character_class_id')
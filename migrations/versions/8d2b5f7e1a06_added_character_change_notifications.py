@@ -0,0 +1,71 @@
+"""Added character change notifications
+
+Revision ID: 8d2b5f7e1a06
+Revises: 3f8a1c6e2b94
+Create Date: 2026-10-19 18:02:13.904318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2b5f7e1a06'
+down_revision: Union[str, None] = '3f8a1c6e2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose rows belong to one character. Every committed change to one
+# sends a NOTIFY on 'character_changes' naming the character (and its owner,
+# for the characters table) so other instances can drop their cached copies.
+# Row level, unlike the catalog version triggers, because the payload needs
+# the character; Postgres folds identical payloads within one transaction.
+LINK_TABLES = [
+    'characterfeatlink',
+    'characterspelllink',
+    'characterstatlink',
+    'characterskilllink',
+    'characterweaponlink',
+    'characterarmorlink',
+    'characterinventorylink',
+    'charactermoneylink',
+]
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_character_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'characters' THEN
+                IF TG_OP <> 'INSERT' THEN
+                    PERFORM pg_notify('character_changes', json_build_object('character', OLD.id, 'user', OLD.user_id)::text);
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    PERFORM pg_notify('character_changes', json_build_object('character', NEW.id, 'user', NEW.user_id)::text);
+                END IF;
+            ELSE
+                IF TG_OP <> 'INSERT' THEN
+                    PERFORM pg_notify('character_changes', json_build_object('character', OLD.character_id)::text);
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    PERFORM pg_notify('character_changes', json_build_object('character', NEW.character_id)::text);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in ['characters', *LINK_TABLES]:
+        op.execute(f"""
+            CREATE TRIGGER {table}_changed
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_character_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in ['characters', *LINK_TABLES]:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_changed ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_character_change()")
@@ -0,0 +1,85 @@
+"""Link tables keyed by character and item
+
+Revision ID: 9e4a6c1d3b58
+Revises: 5b7d3a9c2f41
+Create Date: 2026-10-19 22:03:41.918254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a6c1d3b58'
+down_revision: Union[str, None] = '5b7d3a9c2f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Link table -> (item column, how duplicate rows for one character and item
+# are folded into the row that's kept). The kept row is the newest one, so
+# plain values (stat scores, skill ranks) keep their latest setting.
+LINK_TABLES = {
+    'characterfeatlink': ('feat_id', None),
+    'characterspelllink': ('spell_id', None),
+    'characterstatlink': ('stat_id', None),
+    'characterskilllink': ('skill_id', None),
+    'characterweaponlink': ('weapon_id', {'quantity': 'SUM(COALESCE(quantity, 1))'}),
+    'characterarmorlink': ('armor_id', {'quantity': 'SUM(COALESCE(quantity, 1))', 'equipped': 'BOOL_OR(equipped)'}),
+    'characterinventorylink': ('equipment_id', {'quantity': 'SUM(COALESCE(quantity, 1))'}),
+    'charactermoneylink': ('money_id', None),
+}
+
+
+def upgrade() -> None:
+    # Armor was stored one row per piece; it gets a quantity like the others
+    op.add_column('characterarmorlink', sa.Column('quantity', sa.Integer(), nullable=True, server_default='1'))
+    op.alter_column('characterarmorlink', 'quantity', server_default=None)
+
+    for table, (item, merge) in LINK_TABLES.items():
+        if merge:
+            assignments = ', '.join(f'{column} = merged.{column}' for column in merge)
+            aggregates = ', '.join(f'{expression} AS {column}' for column, expression in merge.items())
+            op.execute(f"""
+                UPDATE {table} SET {assignments}
+                FROM (
+                    SELECT MAX(id) AS keep_id, {aggregates}
+                    FROM {table}
+                    GROUP BY character_id, {item}
+                    HAVING COUNT(*) > 1
+                ) merged
+                WHERE {table}.id = merged.keep_id
+            """)
+        op.execute(f"""
+            DELETE FROM {table} older USING {table} newer
+            WHERE older.character_id = newer.character_id
+              AND older.{item} = newer.{item}
+              AND older.id < newer.id
+        """)
+
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+        # The new primary key leads with character_id, so this is redundant
+        op.drop_index(op.f(f'ix_{table}_character_id'), table_name=table, if_exists=True)
+        op.drop_column(table, 'id')
+        op.create_primary_key(f'{table}_pkey', table, ['character_id', item])
+        op.create_index(f'ix_{table}_{item}_character_id', table, [item, 'character_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Merged duplicates stay merged; armor quantities are dropped
+    for table, (item, merge) in LINK_TABLES.items():
+        op.drop_index(f'ix_{table}_{item}_character_id', table_name=table)
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.add_column(table, sa.Column('id', sa.Integer(), nullable=True))
+        op.execute(f"""
+            UPDATE {table} SET id = numbered.n
+            FROM (SELECT ctid, ROW_NUMBER() OVER (ORDER BY character_id, {item}) AS n FROM {table}) numbered
+            WHERE {table}.ctid = numbered.ctid
+        """)
+        op.alter_column(table, 'id', nullable=False)
+        op.create_primary_key(f'{table}_pkey', table, ['id', 'character_id', item])
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+        op.create_index(op.f(f'ix_{table}_character_id'), table, ['character_id'], unique=False)
+    op.drop_column('characterarmorlink', 'quantity')
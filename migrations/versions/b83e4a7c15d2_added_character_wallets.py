@@ -0,0 +1,26 @@
+"""Added character wallets
+
+Revision ID: b83e4a7c15d2
+Revises: 6f1d2c9a0b3e
+Create Date: 2026-10-19 10:02:17.540931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83e4a7c15d2'
+down_revision: Union[str, None] = '6f1d2c9a0b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('characters', sa.Column('wallet_copper', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('characters', 'wallet_copper')
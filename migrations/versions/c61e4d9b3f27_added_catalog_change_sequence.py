@@ -0,0 +1,89 @@
+"""Added catalog change sequence
+
+Revision ID: c61e4d9b3f27
+Revises: 8d2b5f7e1a06
+Create Date: 2026-10-19 18:41:55.310962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'c61e4d9b3f27'
+down_revision: Union[str, None] = '8d2b5f7e1a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATALOG_TABLES = [
+    'alignments',
+    'armor',
+    'bab_progressions',
+    'caster_types',
+    'character_classes',
+    'class_abilities',
+    'equipment',
+    'feats',
+    'languages',
+    'money_values',
+    'races',
+    'racial_traits',
+    'saving_throw_progressions',
+    'skills',
+    'spells',
+    'stats',
+    'weapons',
+]
+
+# Every catalog write takes this transaction-level advisory lock before
+# drawing a sequence number, so catalog transactions commit in sequence
+# order and a client that has seen N can never later miss a change below N.
+# Catalog writes are rare, so serialising them costs nothing noticeable.
+CHANGE_LOCK = 7301
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE catalog_change_seq")
+    op.create_table(
+        'catalog_tombstones',
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('change_seq'),
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION stamp_catalog_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock({CHANGE_LOCK});
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO catalog_tombstones (change_seq, table_name, row_id)
+                VALUES (nextval('catalog_change_seq'), TG_TABLE_NAME, OLD.id);
+                RETURN OLD;
+            END IF;
+            NEW.change_seq := nextval('catalog_change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in CATALOG_TABLES:
+        # The volatile default numbers the existing rows as the column is added
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True, server_default=sa.text("nextval('catalog_change_seq')")))
+        op.alter_column(table, 'change_seq', server_default=None)
+        op.create_index(op.f(f'ix_{table}_change_seq'), table, ['change_seq'], unique=False)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_seq
+            BEFORE INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION stamp_catalog_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in CATALOG_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_seq ON {table}")
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        op.drop_column(table, 'change_seq')
+    op.execute("DROP FUNCTION IF EXISTS stamp_catalog_change()")
+    op.drop_table('catalog_tombstones')
+    op.execute("DROP SEQUENCE IF EXISTS catalog_change_seq")
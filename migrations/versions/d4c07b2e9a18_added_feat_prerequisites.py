@@ -0,0 +1,27 @@
+"""Added feat prerequisites
+
+Revision ID: d4c07b2e9a18
+Revises: 2a9e7f0c4d61
+Create Date: 2026-10-19 11:20:08.664912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4c07b2e9a18'
+down_revision: Union[str, None] = '2a9e7f0c4d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('feats', sa.Column('prerequisites', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('feats', 'prerequisites')
@@ -0,0 +1,26 @@
+"""Added character hit points
+
+Revision ID: e5f92a6d0c37
+Revises: 7b51e0d3c8f4
+Create Date: 2026-10-19 12:47:03.815290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f92a6d0c37'
+down_revision: Union[str, None] = '7b51e0d3c8f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('characters', sa.Column('hit_points', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('characters', 'hit_points')
@@ -1,4 +1,4 @@
-from .base import Base
+from .base import Base, CatalogBase
 from .character_class import CharacterClass
 from .class_ability import ClassAbility
 from .alignment import Alignment
@@ -16,4 +16,4 @@ from .spells import Spell
 from .stats import Stat
 from .caster_type import CasterType
 from .feats import Feat
-from .characters import Character, CharacterArmorLink, CharacterFeatLink, CharacterInventoryLink, CharacterMoneyLink, CharacterSkillLink, CharacterSpellLink, CharacterStatLink, CharacterWeaponLink
\ No newline at end of file
+from .characters import Character, CharacterPayload, CharacterHolding, HOLDING_KINDS, HOLDING_LISTS, CharacterArmorLink, CharacterFeatLink, CharacterInventoryLink, CharacterMoneyLink, CharacterSkillLink, CharacterSpellLink, CharacterStatLink, CharacterWeaponLink
\ No newline at end of file
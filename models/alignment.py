@@ -1,7 +1,7 @@
 from sqlmodel import SQLModel
-from .base import Base
+from .base import CatalogBase
 
-class Alignment(Base, table=True):
+class Alignment(CatalogBase, table=True):
     __tablename__ = 'alignments'
 
     name: str
@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class Armor(Base, table=True):
+class Armor(CatalogBase, table=True):
     __tablename__ = 'armor'
 
     name: str = Field(nullable=True)  # Added missing name field
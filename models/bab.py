@@ -1,7 +1,7 @@
 from sqlmodel import Field, SQLModel
-from .base import Base
+from .base import CatalogBase
 
-class BABProgression(Base, table=True):
+class BABProgression(CatalogBase, table=True):
     __tablename__ = 'bab_progressions'
 
     level: int = Field(nullable=True, default=1)
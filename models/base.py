@@ -1,3 +1,5 @@
+from typing import Optional
+from sqlalchemy import BigInteger
 from sqlmodel import Field, SQLModel
 
 class Base(SQLModel):
@@ -6,4 +8,8 @@ class Base(SQLModel):
         primary_key=True,
         index=True,
         nullable=False
-    )
\ No newline at end of file
+    )
+
+class CatalogBase(Base):
+    # Set by the database on every insert/update from catalog_change_seq; see /catalog/changes
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True, nullable=True)
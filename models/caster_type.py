@@ -1,8 +1,8 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class CasterType(Base, table=True):
+class CasterType(CatalogBase, table=True):
     __tablename__="caster_types"
     type_id: Optional[int] = Field(default=None, index=True, nullable=True)
     character_level: Optional[int] = Field(default=None, index=True, nullable=True)  # Level the progression applies to
@@ -1,9 +1,9 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
 from sqlalchemy.dialects.postgresql import JSONB
-from .base import Base
+from .base import CatalogBase
 
-class CharacterClass(Base, table=True):
+class CharacterClass(CatalogBase, table=True):
     __tablename__ = 'character_classes'
 
     name: str = Field(nullable=True, default="No Name Found")
@@ -1,74 +1,141 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field
 from .base import Base
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Index
 from typing import Optional
 
-class Character(Base, table=True):
-    __tablename__ = "characters"
+class CharacterFields(Base):
     name: str = Field(nullable=False)
     level: Optional[int] = Field(default=1)  # Track the character's current level
+    hit_points: Optional[int] = Field(default=None, nullable=True)  # Maximum hit points
 
-    user_id: str = Field(nullable=False)
+    user_id: str = Field(nullable=False, index=True)
 
     # Foreign keys for single reference columns
     character_class_id: Optional[int] = Field(default=None, foreign_key="character_classes.id")
     alignment_id: Optional[int] = Field(default=None, foreign_key="alignments.id")
     save_progression_type: Optional[str] = Field(default=None, nullable=True)  # e.g., "Good", "Poor", or a custom string
-    feats: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    spells: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    stats: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    skills: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    weapons: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    armor: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    inventory_items: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
-    money: Optional[list] = Field(sa_type=JSONB, default=None, nullable=True)
     race_id: Optional[int] = Field(default=None, foreign_key="races.id")
+    wallet_copper: int = Field(default=0, nullable=False)  # Money held, in copper pieces
+
+class Character(CharacterFields, table=True):
+    __tablename__ = "characters"
+
+# What a character holds, one row per (character, kind, catalog id), with the
+# kind saying which catalog table ref_id points into. Keyed by character
+# first, so a whole sheet is one range scan of the primary key; the reverse
+# index serves "who holds this item". Each kind only uses the columns its
+# link shape below has.
+class CharacterHolding(SQLModel, table=True):
+    __tablename__ = "characterholdings"
+    __table_args__ = (Index("ix_characterholdings_kind_ref_id_character_id", "kind", "ref_id", "character_id"),)
+
+    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True, ondelete="CASCADE")
+    kind: str = Field(primary_key=True)  # A key of HOLDING_KINDS
+    ref_id: int = Field(primary_key=True)  # id in the kind's catalog table
+    quantity: Optional[int] = Field(default=None)
+    equipped: Optional[bool] = Field(default=None)
+    ranks: Optional[int] = Field(default=None)
+    value: Optional[int] = Field(default=None)
+    container_id: Optional[int] = Field(default=None, foreign_key="equipment.id")  # Container item this is stored in, if any
+
+    @classmethod
+    def from_link(cls, link) -> "CharacterHolding":
+        kind = LINK_KINDS[type(link)]
+        item_column = HOLDING_KINDS[kind][1]
+        values = link.model_dump(exclude={"character_id", item_column})
+        return cls(character_id=link.character_id, kind=kind, ref_id=getattr(link, item_column), **values)
+
+    def as_link(self):
+        link_model, item_column, _ = HOLDING_KINDS[self.kind]
+        values = {field: getattr(self, field) for field in link_model.model_fields if field not in ("character_id", item_column)}
+        return link_model(character_id=self.character_id, **{item_column: self.ref_id}, **values)
+
+    def key_after(self, link_update) -> tuple:
+        # The primary key this holding would have once link_update is applied
+        item_column = HOLDING_KINDS[self.kind][1]
+        values = link_update.model_dump(exclude_unset=True)
+        return values.get("character_id", self.character_id), self.kind, values.get(item_column, self.ref_id)
+
+    def update_from(self, link_update):
+        # Applies the fields set on a link shape, e.g. a PUT body
+        item_column = HOLDING_KINDS[self.kind][1]
+        for key, value in link_update.model_dump(exclude_unset=True).items():
+            setattr(self, "ref_id" if key == item_column else key, value)
+
+# The API's view of a holding of each kind
+class CharacterFeatLink(SQLModel):
+    character_id: Optional[int] = None
+    feat_id: Optional[int] = None
+
+class CharacterSpellLink(SQLModel):
+    character_id: Optional[int] = None
+    spell_id: Optional[int] = None
+
+class CharacterStatLink(SQLModel):
+    character_id: Optional[int] = None
+    stat_id: Optional[int] = None
+    value: Optional[int] = None  # Store the stat value if applicable
+
+class CharacterSkillLink(SQLModel):
+    character_id: Optional[int] = None
+    skill_id: Optional[int] = None
+    ranks: Optional[int] = None  # Track ranks in each skill
+
+class CharacterWeaponLink(SQLModel):
+    character_id: Optional[int] = None
+    weapon_id: Optional[int] = None
+    quantity: Optional[int] = 1  # Optional: Track multiple weapons of the same type
+
+class CharacterArmorLink(SQLModel):
+    character_id: Optional[int] = None
+    armor_id: Optional[int] = None
+    quantity: Optional[int] = 1  # Pieces of this armor the character owns
+    equipped: Optional[bool] = False  # Optional: Track if armor is equipped
+
+class CharacterInventoryLink(SQLModel):
+    character_id: Optional[int] = None
+    equipment_id: Optional[int] = None
+    quantity: Optional[int] = 1  # Optional: Track quantity of inventory items
+    container_id: Optional[int] = None  # Container item this is stored in, if any
+
+class CharacterMoneyLink(SQLModel):
+    character_id: Optional[int] = None
+    money_id: Optional[int] = None
+
+# Holding kind -> (link shape, its item column, the catalog table ref_id points into)
+HOLDING_KINDS = {
+    "feat": (CharacterFeatLink, "feat_id", "feats"),
+    "spell": (CharacterSpellLink, "spell_id", "spells"),
+    "stat": (CharacterStatLink, "stat_id", "stats"),
+    "skill": (CharacterSkillLink, "skill_id", "skills"),
+    "weapon": (CharacterWeaponLink, "weapon_id", "weapons"),
+    "armor": (CharacterArmorLink, "armor_id", "armor"),
+    "equipment": (CharacterInventoryLink, "equipment_id", "equipment"),
+    "money": (CharacterMoneyLink, "money_id", "money_values"),
+}
+LINK_KINDS = {link_model: kind for kind, (link_model, _, _) in HOLDING_KINDS.items()}
+
+# Lists the character payload carried before holdings got their own table ->
+# the kind of holding each lists. They're still returned, built from the
+# holdings, but are changed through the link routes, not the character.
+HOLDING_LISTS = {
+    "feats": "feat",
+    "spells": "spell",
+    "stats": "stat",
+    "skills": "skill",
+    "weapons": "weapon",
+    "armor": "armor",
+    "inventory_items": "equipment",
+    "money": "money",
+}
 
-    # Relationships without List or cascade delete
-    # feats: Optional["CharacterFeatLink"] = Relationship()
-    # spells: Optional["CharacterSpellLink"] = Relationship()
-    # stats: Optional["CharacterStatLink"] = Relationship()
-    # skills: Optional["CharacterSkillLink"] = Relationship()
-    # weapons: Optional["CharacterWeaponLink"] = Relationship()
-    # armor: Optional["CharacterArmorLink"] = Relationship()
-    # inventory_items: Optional["CharacterInventoryLink"] = Relationship()
-    # money: Optional["CharacterMoneyLink"] = Relationship()
-
-# Join tables for many-to-many relationships
-class CharacterFeatLink(Base, table=True):
-    
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    feat_id: Optional[int] = Field(default=None, foreign_key="feats.id", primary_key=True)
-
-class CharacterSpellLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    spell_id: Optional[int] = Field(default=None, foreign_key="spells.id", primary_key=True)
-
-class CharacterStatLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    stat_id: Optional[int] = Field(default=None, foreign_key="stats.id", primary_key=True)
-    value: Optional[int] = Field(default=None)  # Store the stat value if applicable
-
-class CharacterSkillLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    skill_id: Optional[int] = Field(default=None, foreign_key="skills.id", primary_key=True)
-    ranks: Optional[int] = Field(default=None)  # Track ranks in each skill
-
-class CharacterWeaponLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    weapon_id: Optional[int] = Field(default=None, foreign_key="weapons.id", primary_key=True)
-    quantity: Optional[int] = Field(default=1)  # Optional: Track multiple weapons of the same type
-
-class CharacterArmorLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    armor_id: Optional[int] = Field(default=None, foreign_key="armor.id", primary_key=True)
-    equipped: Optional[bool] = Field(default=False)  # Optional: Track if armor is equipped
-
-class CharacterInventoryLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    equipment_id: Optional[int] = Field(default=None, foreign_key="equipment.id", primary_key=True)
-    quantity: Optional[int] = Field(default=1)  # Optional: Track quantity of inventory items
-
-class CharacterMoneyLink(Base, table=True):
-    character_id: Optional[int] = Field(default=None, foreign_key="characters.id", primary_key=True)
-    money_id: Optional[int] = Field(default=None, foreign_key="money_values.id", primary_key=True)
+# Request and response bodies of the character routes
+class CharacterPayload(CharacterFields):
+    feats: Optional[list] = None
+    spells: Optional[list] = None
+    stats: Optional[list] = None
+    skills: Optional[list] = None
+    weapons: Optional[list] = None
+    armor: Optional[list] = None
+    inventory_items: Optional[list] = None
+    money: Optional[list] = None
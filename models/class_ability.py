@@ -1,12 +1,18 @@
-from sqlmodel import Relationship, Column
-from sqlalchemy import Column, Integer, String, Float
-from .base import Base
+from sqlmodel import Relationship, Column, Field
+from sqlalchemy import Column, Integer, String, Float, Index
+from typing import Optional
+from .base import CatalogBase
 
-class ClassAbility(Base, table=True):
+class ClassAbility(CatalogBase, table=True):
     __tablename__ = "class_abilities"
+    __table_args__ = (
+        # Serves "abilities for class X up to level N"
+        Index("ix_class_abilities_class_level", "character_class_id", "level_requirement"),
+    )
     
     name: str = Column(String, nullable=True)
     description: str = Column(String, nullable=True)
     level_requirement: int = Column(Integer, nullable=True)
     numeric_modifier: float = Column(Float, nullable=True)
-    category: str = Column(String, nullable=True)
\ No newline at end of file
+    category: str = Column(String, nullable=True)
+    character_class_id: Optional[int] = Field(default=None, nullable=True, foreign_key="character_classes.id")
\ No newline at end of file
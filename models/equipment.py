@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class Equipment(Base, table=True):
+class Equipment(CatalogBase, table=True):
     __tablename__ = 'equipment'
 
     name: str
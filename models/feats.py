@@ -1,12 +1,15 @@
 from sqlmodel import Field, SQLModel
 from typing import Optional
-from .base import Base
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import CatalogBase
 
-class Feat(Base, table=True):
+class Feat(CatalogBase, table=True):
     __tablename__ = 'feats'
 
     name: str
     description: str = Field(nullable=True, default="")
     numeric_modifier: Optional[float] = Field(nullable=True)
     level_requirement: int = Field(nullable=True, default=1)
-    category: str = Field(nullable=True, default="General")
\ No newline at end of file
+    category: str = Field(nullable=True, default="General")
+    # e.g. [{"feat": "Power Attack"}, {"stat": "Strength", "min": 13}, {"bab": 1}, {"class": "Fighter"}]
+    prerequisites: list = Field(sa_type=JSONB, nullable=True, default=[])
\ No newline at end of file
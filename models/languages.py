@@ -1,9 +1,9 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
 from sqlalchemy.dialects.postgresql import JSONB
-from .base import Base
+from .base import CatalogBase
 
-class Language(Base, table=True):
+class Language(CatalogBase, table=True):
     __tablename__ = 'languages'
 
     name: str = Field(nullable=True)
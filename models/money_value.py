@@ -1,7 +1,7 @@
 from sqlmodel import Field, SQLModel, Relationship
-from .base import Base
+from .base import CatalogBase
 
-class MoneyValue(Base, table=True):
+class MoneyValue(CatalogBase, table=True):
     __tablename__ = 'money_values'
 
     platinum: float = Field(nullable=True, default=10)
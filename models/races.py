@@ -1,9 +1,9 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
 from sqlalchemy.dialects.postgresql import JSONB
-from .base import Base
+from .base import CatalogBase
 
-class Race(Base, table=True):
+class Race(CatalogBase, table=True):
     __tablename__ = 'races'
 
     name: str = Field(nullable=True)
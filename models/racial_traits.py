@@ -1,10 +1,11 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class RacialTrait(Base, table=True):
+class RacialTrait(CatalogBase, table=True):
     __tablename__ = 'racial_traits'
 
     category: str = Field(nullable=True, default="General")
     description: str = Field(nullable=True, default="")
-    numeric_modifier: Optional[float] = Field(nullable=True)
\ No newline at end of file
+    numeric_modifier: Optional[float] = Field(nullable=True)
+    race_id: Optional[int] = Field(default=None, nullable=True, foreign_key="races.id")
\ No newline at end of file
@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class SavingThrowProgression(Base, table=True):
+class SavingThrowProgression(CatalogBase, table=True):
     __tablename__ = 'saving_throw_progressions'
 
     level: Optional[int] = Field(default=None, index=True, nullable=True)  # Character level for the progression
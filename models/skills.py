@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class Skill(Base, table=True):
+class Skill(CatalogBase, table=True):
     __tablename__ = 'skills'
 
     name: str = Field(nullable=True)
@@ -1,10 +1,16 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
+from sqlalchemy import Index
 from sqlalchemy.dialects.postgresql import JSONB
-from .base import Base
+from .base import CatalogBase
 
-class Spell(Base, table=True):
+class Spell(CatalogBase, table=True):
     __tablename__ = 'spells'
+    __table_args__ = (
+        Index("ix_spells_level_school", "spell_level", "school"),
+        # Serves class_lists @> '["Wizard"]'
+        Index("ix_spells_class_lists", "class_lists", postgresql_using="gin", postgresql_ops={"class_lists": "jsonb_path_ops"}),
+    )
 
     name: str = Field(nullable=True)  # Added missing name field
     spell_level: int = Field(nullable=True, default=0)
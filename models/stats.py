@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel, Relationship
-from .base import Base
+from .base import CatalogBase
 
 
-class Stat(Base, table=True):
+class Stat(CatalogBase, table=True):
     __tablename__ = 'stats'
 
     name: str = Field(nullable=True)
@@ -1,8 +1,8 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
-from .base import Base
+from .base import CatalogBase
 
-class Weapon(Base, table=True):
+class Weapon(CatalogBase, table=True):
     __tablename__ = 'weapons'
 
     name: str = Field(nullable=True)  # Added missing name field
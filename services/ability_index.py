@@ -0,0 +1,42 @@
+from bisect import bisect_right
+from collections import defaultdict
+from sqlmodel import Session, select
+from models import ClassAbility
+from services.catalog_cache import cached
+
+
+@cached("class_abilities")
+def abilities_by_class(session: Session):
+    """
+    class id -> (sorted levels, abilities in the same order), so a level range
+    is two bisects and a slice.
+    """
+    abilities = session.exec(
+        select(ClassAbility)
+        .where(ClassAbility.character_class_id.is_not(None))
+    ).all()
+
+    # Sorted here rather than in SQL, so abilities with no level requirement
+    # sort as level 0, the level they're bisected as
+    grouped = defaultdict(list)
+    for ability in sorted(abilities, key=lambda ability: (ability.level_requirement or 0, ability.id)):
+        grouped[ability.character_class_id].append(ability)
+
+    return {
+        class_id: (
+            [ability.level_requirement or 0 for ability in rows],
+            [ability.model_dump() for ability in rows],
+        )
+        for class_id, rows in grouped.items()
+    }
+
+
+def class_abilities(session: Session, class_id: int, min_level: int = None, max_level: int = None):
+    """
+    Abilities of a class with min_level < level_requirement <= max_level.
+    Either bound can be left out.
+    """
+    levels, abilities = abilities_by_class(session).get(class_id, ([], []))
+    start = bisect_right(levels, min_level) if min_level is not None else 0
+    end = bisect_right(levels, max_level) if max_level is not None else len(levels)
+    return abilities[start:end]
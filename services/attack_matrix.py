@@ -0,0 +1,111 @@
+from functools import lru_cache
+from sqlmodel import Session
+from services.character_document import character_section
+from services.dice import DiceError, dice_distributions, distribution_stats, shift
+from services.progression import ability_modifier, base_attack_bonus_for_class_id, scores_from_links
+
+MAX_AC_VALUES = 100
+ITERATIVE_ATTACK_STEP = 5  # each extra attack in a full attack is at -5
+MAX_ATTACKS = 4
+
+
+def parse_ac_range(value: str) -> list:
+    """
+    "10..30" -> [10, 11, ..., 30]; a single number is a range of one.
+    Raises ValueError if the range is malformed or too long.
+    """
+    low, separator, high = value.partition("..")
+    low = int(low)
+    high = int(high) if separator else low
+    if high < low or high - low + 1 > MAX_AC_VALUES:
+        raise ValueError(f"AC range must run low to high and cover at most {MAX_AC_VALUES} values")
+    return list(range(low, high + 1))
+
+
+def attack_bonuses(base_attack_bonus: int, attack_modifier: int) -> list:
+    # A full attack: one attack per 5 points of BAB, each 5 lower than the last
+    count = min(MAX_ATTACKS, max(1, (base_attack_bonus - 1) // ITERATIVE_ATTACK_STEP + 1))
+    return [base_attack_bonus + attack_modifier - ITERATIVE_ATTACK_STEP * i for i in range(count)]
+
+
+@lru_cache(maxsize=4096)
+def average_damage(damage_dice: str, bonus: int) -> float:
+    # Average damage of a hit with the weapon's first head, at least 1 per hit.
+    # Keyed by the expression, so it never needs invalidating.
+    return distribution_stats(shift(dice_distributions(damage_dice)[0], bonus, floor=1))["mean"]
+
+
+# Chance to hit by (AC - attack bonus), from -1 up: a natural 1 always
+# misses and a natural 20 always hits, so it's flat outside 2..20
+_HIT_CHANCE = tuple((21 - min(max(needed, 2), 20)) / 20 for needed in range(-1, 22))
+
+
+@lru_cache(maxsize=4096)
+def hit_chance_vectors(attack_bonuses: tuple, ac_values: tuple) -> tuple:
+    """
+    (chance to hit with the first attack, expected hits of the full attack)
+    at each AC, for every attack at once. The inputs are a few small ints,
+    so the vectors are cached and a repeat request just looks them up.
+    """
+    per_attack = [
+        [_HIT_CHANCE[min(max(ac - bonus, -1), 21) + 1] for ac in ac_values]
+        for bonus in attack_bonuses
+    ]
+    return tuple(per_attack[0]), tuple(map(sum, zip(*per_attack)))
+
+
+def weapon_attack_row(weapon: dict, base_attack_bonus: int, modifiers: dict, ac_values: list) -> dict:
+    ranged = (weapon.get("type") or "").strip().lower() == "ranged"
+    enhancement = int(weapon.get("numeric_modifier") or 0)
+    attack_modifier = (modifiers["dex"] if ranged else modifiers["str"]) + enhancement
+    damage_bonus = (0 if ranged else modifiers["str"]) + enhancement
+    row = {
+        "weapon_id": weapon["id"],
+        "name": weapon.get("name"),
+        "damage_dice": weapon.get("damage_dice"),
+        "attack_bonuses": attack_bonuses(base_attack_bonus, attack_modifier),
+        "damage_bonus": damage_bonus,
+    }
+    try:
+        damage = average_damage(weapon.get("damage_dice") or "", damage_bonus)
+    except DiceError as e:
+        row["error"] = str(e)
+        return row
+
+    first_attack, full_attack = hit_chance_vectors(tuple(row["attack_bonuses"]), tuple(ac_values))
+    row["average_damage"] = damage
+    row["hit_chance"] = list(first_attack)
+    row["expected_damage"] = [round(chance * damage, 4) for chance in first_attack]
+    row["full_attack_damage"] = [round(hits * damage, 4) for hits in full_attack]
+    return row
+
+
+def attack_matrix(session: Session, character_id: int, ac_values: list):
+    """
+    Hit chance and expected damage for each of the character's weapons
+    against every AC in ac_values, or None if there's no such character.
+    Melee weapons use Strength to hit and for damage, ranged weapons use
+    Dexterity to hit; numeric_modifier is an enhancement bonus to both.
+    Critical hits aren't counted, since weapons don't record a threat range.
+    Everything is read from the character and catalog caches.
+    """
+    character = character_section(session, character_id, "character")
+    if character is None:
+        return None
+
+    level = character.get("level") or 1
+    bab = base_attack_bonus_for_class_id(session, character.get("character_class_id"), level)
+    stats = character_section(session, character_id, "stats")
+    scores = scores_from_links(session, ((link["stat_id"], link["value"]) for link in stats))
+    modifiers = {
+        "str": ability_modifier(scores.get("strength", scores.get("str"))),
+        "dex": ability_modifier(scores.get("dexterity", scores.get("dex"))),
+    }
+    weapons = character_section(session, character_id, "weapons")
+    return {
+        "character_id": character_id,
+        "base_attack_bonus": bab,
+        "ability_modifiers": modifiers,
+        "ac": ac_values,
+        "weapons": [weapon_attack_row(weapon, bab, modifiers, ac_values) for weapon in weapons],
+    }
@@ -0,0 +1,299 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_URL = os.getenv("CACHE_URL")  # e.g. redis://default:pw@fly-cache.upstash.io:6379; unset runs in-process only
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "pathapp:")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))  # seconds a shared value lives without being touched
+CACHE_RETRY_AFTER = 5.0  # seconds to leave an unreachable backend alone
+SUBSCRIBE_RETRY_MIN = 1.0  # seconds before retrying a failed subscription, doubling each time
+SUBSCRIBE_RETRY_MAX = 60.0
+
+# NamedTuples allowed through the shared cache, by name; see register_type
+_types = {}
+
+
+def register_type(cls):
+    # Lets a NamedTuple be stored in the shared cache and rebuilt on the way out
+    _types[cls.__name__] = cls
+    return cls
+
+
+def _encode(value):
+    # JSON, with tagged objects for the shapes cached values use that JSON
+    # doesn't have. Anything else raises TypeError and isn't shared.
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith("__") for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {"__map": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        if hasattr(value, "_fields"):
+            if _types.get(type(value).__name__) is not type(value):
+                raise TypeError(f"{type(value).__name__} isn't registered for the shared cache")
+            return {"__type": [type(value).__name__, [_encode(item) for item in value]]}
+        return {"__tuple": [_encode(item) for item in value]}
+    if isinstance(value, frozenset):
+        return {"__frozenset": [_encode(item) for item in value]}
+    if isinstance(value, set):
+        return {"__set": [_encode(item) for item in value]}
+    if isinstance(value, bytes):
+        return {"__bytes": base64.b64encode(value).decode()}
+    raise TypeError(f"{type(value).__name__} can't be stored in the shared cache")
+
+
+def _decode_object(obj: dict):
+    if len(obj) != 1 or not next(iter(obj)).startswith("__"):
+        return obj
+    tag, payload = next(iter(obj.items()))
+    if tag == "__map":
+        return {key: item for key, item in payload}
+    if tag == "__tuple":
+        return tuple(payload)
+    if tag == "__frozenset":
+        return frozenset(payload)
+    if tag == "__set":
+        return set(payload)
+    if tag == "__bytes":
+        return base64.b64decode(payload)
+    if tag == "__type":
+        name, fields = payload
+        return _types[name](*fields)
+    raise ValueError(f"Unknown shared cache tag {tag!r}")
+
+
+def dumps(value) -> bytes:
+    return json.dumps(_encode(value), separators=(",", ":")).encode()
+
+
+def loads(raw: bytes):
+    return json.loads(raw, object_hook=_decode_object)
+
+
+class LocalBackend:
+    """
+    Embedded stand-in for a Redis server: a dict with expiry and in-process
+    pub/sub. Used when CACHE_URL isn't set (local runs, tests, a single
+    machine), so the version counters and invalidation messages go through
+    the same code paths everywhere. Cached values aren't kept here.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value, expires = self._values.get(key, (None, None))
+            if expires is not None and expires < time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int = None):
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._values.get(key, (0, None))[0]) + 1
+            self._values[key] = (value, None)
+            return value
+
+    def get_many(self, keys: list) -> list:
+        return [self.get(key) for key in keys]
+
+    def publish(self, channel: str, message: str):
+        for callback in list(self._subscribers.get(channel, ())):
+            callback(message)
+
+    def subscribe(self, channel: str, callback):
+        self._subscribers.setdefault(channel, []).append(callback)
+        return lambda: self._subscribers[channel].remove(callback)
+
+
+class RedisBackend:
+    """Anything that speaks the Redis protocol (Redis, Valkey, Upstash, ...)."""
+
+    def __init__(self, url: str):
+        import redis  # only needed when a shared cache is configured
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=1, health_check_interval=30)
+
+    def get(self, key: str):
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int = None):
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*keys)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+    def get_many(self, keys: list) -> list:
+        return self.client.mget(keys) if keys else []
+
+    def publish(self, channel: str, message: str):
+        self.client.publish(channel, message)
+
+    def subscribe(self, channel: str, callback):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: callback(message["data"].decode())})
+        # The listener thread reconnects and resubscribes by itself if the connection drops
+        listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_log_listener_error)
+        return listener.stop
+
+
+def _log_listener_error(e, pubsub, thread):
+    logger.warning("Cache invalidation listener error: %s", e)
+    time.sleep(1)
+
+
+class SharedCache:
+    """
+    The L2 layer under the in-process caches. Values are stored as JSON (see
+    dumps), so nothing read back can do more than build plain data; values of
+    other types just aren't shared. Every call is best effort:
+    if the backend is unreachable we log it and carry on as if it were a
+    miss, so a cache outage costs latency, not errors.
+    """
+
+    def __init__(self, backend, prefix: str = CACHE_PREFIX, ttl: int = CACHE_TTL):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._pending_subscriptions = 0
+
+    @property
+    def shared(self) -> bool:
+        # Whether other machines see what we write
+        return not isinstance(self.backend, LocalBackend)
+
+    def _call(self, method: str, *args, default=None):
+        # Don't make every request wait out a connect timeout while it's down
+        if time.monotonic() < self._down_until:
+            return default
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            logger.warning("Shared cache %s failed: %s", method, e)
+            self._down_until = time.monotonic() + CACHE_RETRY_AFTER
+            return default
+
+    @property
+    def listening(self) -> bool:
+        # Whether every subscription is in place. Until then we can't hear
+        # other machines' invalidations, so shared values can't be trusted.
+        return self._pending_subscriptions == 0
+
+    # Values are only stored in a backend other machines can see. In a
+    # LocalBackend they'd just be a second copy of the in-process caches,
+    # kept under old versions' keys until they expired.
+    def get(self, key: str):
+        if not self.shared or not self.listening:
+            return None
+        raw = self._call("get", self.prefix + key)
+        if raw is None:
+            return None
+        try:
+            return loads(raw)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning("Ignoring shared cache entry %s that doesn't decode: %s", key, e)
+            return None
+
+    def set(self, key: str, value, ttl: int = None):
+        if not self.shared or not self.listening:
+            return
+        try:
+            raw = dumps(value)
+        except TypeError as e:
+            logger.debug("Not sharing %s: %s", key, e)
+            return
+        self._call("set", self.prefix + key, raw, ttl or self.ttl)
+
+    def delete(self, *keys: str):
+        self._call("delete", *(self.prefix + key for key in keys))
+
+    def incr(self, key: str):
+        return self._call("incr", self.prefix + key)
+
+    def get_counters(self, keys: list):
+        # None if the backend couldn't be reached, as opposed to no counters yet
+        values = self._call("get_many", [self.prefix + key for key in keys])
+        if values is None:
+            return None
+        return {key: int(value) for key, value in zip(keys, values) if value is not None}
+
+    def publish(self, channel: str, message: str):
+        self._call("publish", self.prefix + channel, message)
+
+    def subscribe(self, channel: str, callback):
+        """
+        Calls callback(message) for each message on channel. Returns a
+        function that unsubscribes. If the backend can't be reached, keeps
+        retrying in the background with backoff, and the shared layer is
+        skipped until it gets through.
+        """
+        stopped = threading.Event()
+        listener = {}
+
+        def attempt() -> bool:
+            try:
+                listener["stop"] = self.backend.subscribe(self.prefix + channel, callback)
+                return True
+            except Exception as e:
+                logger.warning("Shared cache subscribe to %s failed: %s", channel, e)
+                return False
+
+        def retry():
+            delay = SUBSCRIBE_RETRY_MIN
+            while not stopped.wait(delay):
+                if attempt():
+                    break
+                delay = min(delay * 2, SUBSCRIBE_RETRY_MAX)
+            with self._lock:
+                self._pending_subscriptions -= 1
+            if stopped.is_set() and "stop" in listener:
+                listener["stop"]()
+
+        def stop():
+            stopped.set()
+            if "stop" in listener:
+                listener["stop"]()
+
+        if not attempt():
+            with self._lock:
+                self._pending_subscriptions += 1
+            threading.Thread(target=retry, name=f"subscribe-{channel}", daemon=True).start()
+        return stop
+
+
+def _make_backend():
+    if CACHE_URL:
+        try:
+            return RedisBackend(CACHE_URL)
+        except Exception:
+            logger.exception("Could not set up the shared cache, caching in-process only")
+    return LocalBackend()
+
+
+shared_cache = SharedCache(_make_backend())
@@ -0,0 +1,183 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import wraps
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session
+from services.cache_backend import shared_cache
+from services.single_flight import flights
+
+logger = logging.getLogger(__name__)
+
+# Every table has a version number that goes up whenever a commit touches it.
+# Cached values remember the versions they were built from and are rebuilt
+# the next time they are asked for after one of those tables has changed.
+#
+# Once the table_versions migration is in, Postgres numbers the versions: a
+# trigger bumps the table's row and NOTIFYs 'table_changes' on every write,
+# and each worker's listener (services/table_notifications.py) applies them.
+# Without it, the counters live in the shared cache and bumps are broadcast
+# on INVALIDATION_CHANNEL. Either way every machine numbers versions the same
+# and each process keeps the highest version it has heard of. Values are kept
+# in process (L1) and in the shared cache (L2), keyed by those versions.
+INVALIDATION_CHANNEL = "table_versions"
+VERSIONS_QUERY = text("SELECT table_name, version FROM table_versions")
+CHANGED_VERSIONS_QUERY = text(
+    "SELECT table_name, version FROM table_versions WHERE table_name IN :tables"
+).bindparams(bindparam("tables", expanding=True))
+
+_versions = defaultdict(int)
+_entries = {}
+_lock = threading.Lock()
+_tracked_tables = set()
+_versions_synced = False
+_database_versions = False
+
+
+def table_version(table: str) -> int:
+    return _versions[table]
+
+
+def apply_versions(versions: dict):
+    with _lock:
+        for table, version in versions.items():
+            _versions[table] = max(_versions[table], version)
+
+
+def bump_tables(*tables: str):
+    # Only used when the database doesn't number versions itself
+    versions = {}
+    for table in tables:
+        shared_version = shared_cache.incr(f"version:{table}")
+        with _lock:
+            _versions[table] = max(_versions[table] + 1, shared_version or 0)
+            versions[table] = _versions[table]
+    shared_cache.publish(INVALIDATION_CHANNEL, json.dumps(versions))
+
+
+def sync_versions(connection) -> bool:
+    """
+    Catches up with the current table versions, e.g. at startup or after the
+    listener has been disconnected. Until this has worked once, values aren't
+    read from the shared cache, since our versions might be behind.
+    """
+    global _versions_synced, _database_versions
+    try:
+        _database_versions = inspect(connection).has_table("table_versions")
+        if _database_versions:
+            versions = dict(connection.execute(VERSIONS_QUERY).all())
+        else:
+            counters = shared_cache.get_counters([f"version:{table}" for table in sorted(_tracked_tables)])
+            if counters is None:
+                return False
+            versions = {key.split(":", 1)[1]: version for key, version in counters.items()}
+    except DBAPIError as e:
+        logger.warning("Could not read table versions: %s", e)
+        return False
+
+    apply_versions(versions)
+    _versions_synced = True
+    return True
+
+
+def start_invalidation_listener():
+    # Returns a function that stops listening
+    def on_message(message: str):
+        try:
+            apply_versions({table: int(version) for table, version in json.loads(message).items()})
+        except (ValueError, AttributeError):
+            logger.warning("Ignoring malformed invalidation message: %r", message)
+
+    return shared_cache.subscribe(INVALIDATION_CHANNEL, on_message)
+
+
+def cached(*tables: str):
+    """
+    Caches the result of loader(session, *args) until one of `tables` changes.
+    Loaders must return plain data (dicts, lists, tuples), never ORM objects,
+    since the value outlives the session it was loaded with. Concurrent misses
+    for the same value share one load instead of each querying the database.
+    """
+    _tracked_tables.update(tables)
+
+    def decorator(loader):
+        @wraps(loader)
+        def wrapper(session: Session, *args):
+            key = (loader.__module__, loader.__qualname__, args)
+            versions = tuple(_versions[table] for table in tables)
+            entry = _entries.get(key)
+            if entry is not None and entry[0] == versions:
+                return entry[1]
+
+            def load():
+                shared_key = f"{loader.__module__}.{loader.__qualname__}:{args!r}:{versions!r}"
+                value = shared_cache.get(shared_key) if _versions_synced else None
+                if value is None:
+                    value = loader(session, *args)
+                    shared_cache.set(shared_key, value)
+                _entries[key] = (versions, value)
+                return value
+            return flights.do((key, versions), load)
+        wrapper.tables = tables
+        return wrapper
+    return decorator
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+# Track which tables each session writes to and bump them once it commits
+def _changed_tables(session) -> set:
+    return session.info.setdefault("changed_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            _changed_tables(session).add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_statements(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _changed_tables(orm_execute_state.session).add(mapper.local_table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _read_new_versions(session):
+    # Read the versions our triggers just bumped while still in the
+    # transaction, so this process sees its own writes without waiting for
+    # the NOTIFY to come back around
+    if not _database_versions:
+        return
+    session.flush()
+    tables = _changed_tables(session) & _tracked_tables
+    if tables:
+        rows = session.connection().execute(CHANGED_VERSIONS_QUERY, {"tables": sorted(tables)}).all()
+        session.info["new_versions"] = dict(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tables(session):
+    tables = session.info.pop("changed_tables", None)
+    versions = session.info.pop("new_versions", None)
+    if versions:
+        apply_versions(versions)
+    elif tables and not _database_versions:
+        tracked = tables & _tracked_tables
+        if tracked:
+            bump_tables(*tracked)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("new_versions", None)
@@ -0,0 +1,83 @@
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, inspect, text
+from sqlmodel import Session, select
+from services.catalog_cache import cached
+from services.catalog_snapshot import CATALOG_MODELS, CATALOG_TABLES
+
+CHANGES_PAGE_SIZE = 1000
+
+TOMBSTONES_QUERY = text(
+    "SELECT change_seq, table_name, row_id FROM catalog_tombstones"
+    " WHERE change_seq > :since ORDER BY change_seq LIMIT :limit"
+)
+TOMBSTONES_HEAD_QUERY = text("SELECT max(change_seq) FROM catalog_tombstones")
+
+_has_tombstones = None
+
+
+def _tombstones_exist(session: Session) -> bool:
+    # Tombstones only exist once the change sequence migration is in
+    global _has_tombstones
+    if _has_tombstones is None:
+        _has_tombstones = inspect(session.connection()).has_table("catalog_tombstones")
+    return _has_tombstones
+
+
+def _tombstones(session: Session, since: int, limit: int) -> list:
+    if not _tombstones_exist(session):
+        return []
+    return session.execute(TOMBSTONES_QUERY, {"since": since, "limit": limit}).all()
+
+
+# Deletes bump the catalog table versions too, so this is cached until any
+# catalog table changes
+@cached(*CATALOG_TABLES)
+def catalog_head(session: Session) -> int:
+    """The sequence number of the latest change to any catalog table."""
+    heads = [session.exec(select(func.max(model.change_seq))).one() for model in CATALOG_MODELS]
+    if _tombstones_exist(session):
+        heads.append(session.execute(TOMBSTONES_HEAD_QUERY).scalar())
+    return max((head for head in heads if head is not None), default=0)
+
+
+def catalog_changes(session: Session, since: int, limit: int = CHANGES_PAGE_SIZE) -> dict:
+    """
+    The catalog rows inserted or updated and the rows deleted after change
+    `since`, oldest first, at most `limit` of them. Clients apply each
+    table's deletes, then its upserts, store `latest`, and ask again while
+    `more` is true.
+    """
+    # Clients polling with the latest sequence number, nearly all of them,
+    # are answered from the cached head without querying. Other pages aren't
+    # cached: `since` and `limit` come from the client, so the cache would
+    # have no bound on its keys.
+    if since >= catalog_head(session):
+        return {"since": since, "latest": since, "more": False, "tables": {}}
+
+    changes = []
+    for model in CATALOG_MODELS:
+        # limit + 1 from each table, so we can tell whether anything was left over
+        rows = session.exec(
+            select(model).where(model.change_seq > since).order_by(model.change_seq).limit(limit + 1)
+        ).all()
+        changes.extend((row.change_seq, model.__tablename__, jsonable_encoder(row)) for row in rows)
+    changes.extend(_tombstones(session, since, limit + 1))
+
+    changes.sort(key=lambda change: change[0])
+    more = len(changes) > limit
+    changes = changes[:limit]
+
+    tables = {}
+    for _, table, row in changes:
+        entry = tables.setdefault(table, {"upserted": [], "deleted": []})
+        if isinstance(row, dict):
+            entry["upserted"].append(row)
+        else:
+            entry["deleted"].append(row)
+
+    return {
+        "since": since,
+        "latest": changes[-1][0] if changes else since,
+        "more": more,
+        "tables": tables,
+    }
@@ -0,0 +1,71 @@
+import hashlib
+import json
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, select
+from models import Alignment, Armor, BABProgression, CasterType, CharacterClass, ClassAbility, Equipment, Feat, Language, MoneyValue, Race, RacialTrait, SavingThrowProgression, Skill, Spell, Stat, Weapon
+from services.catalog_cache import cached
+
+# Reference data that changes rarely and is the same for every user
+CATALOG_MODELS = [
+    Alignment,
+    Armor,
+    BABProgression,
+    CasterType,
+    CharacterClass,
+    ClassAbility,
+    Equipment,
+    Feat,
+    Language,
+    MoneyValue,
+    Race,
+    RacialTrait,
+    SavingThrowProgression,
+    Skill,
+    Spell,
+    Stat,
+    Weapon,
+]
+
+
+def _snapshot_loader(model):
+    @cached(model.__tablename__)
+    def load(session: Session, table: str):
+        rows = session.exec(select(model).order_by(model.id)).all()
+        body = json.dumps(jsonable_encoder(rows), separators=(",", ":"), sort_keys=True).encode()
+        return {"hash": hashlib.sha256(body).hexdigest()[:20], "body": body}
+    return load
+
+
+_snapshots = {model.__tablename__: _snapshot_loader(model) for model in CATALOG_MODELS}
+CATALOG_TABLES = sorted(_snapshots)
+
+
+def catalog_snapshot(session: Session, table: str):
+    """
+    The serialized table and the hash of its contents, or None for a table
+    that isn't part of the catalog. Rebuilt only when the table changes.
+    """
+    loader = _snapshots.get(table)
+    return loader(session, table) if loader else None
+
+
+def catalog_manifest(session: Session) -> dict:
+    return {table: catalog_snapshot(session, table)["hash"] for table in CATALOG_TABLES}
+
+
+# Response key -> catalog table, for /character_creation_data/
+CREATION_TABLES = {
+    "classes": "character_classes",
+    "races": "races",
+    "stats": "stats",
+    "skills": "skills",
+    "feats": "feats",
+    "alignments": "alignments",
+}
+
+
+@cached(*CREATION_TABLES.values())
+def creation_data(session: Session) -> bytes:
+    # Stitched together from the table snapshots, which are already serialized
+    parts = [f'"{key}":'.encode() + catalog_snapshot(session, table)["body"] for key, table in CREATION_TABLES.items()]
+    return b"{" + b",".join(parts) + b"}"
@@ -0,0 +1,279 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from sqlmodel import Session
+from services.single_flight import flights
+
+logger = logging.getLogger(__name__)
+
+CHARACTER_CACHE_SIZE = int(os.getenv("CHARACTER_CACHE_SIZE", "5000"))  # characters
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "2000"))  # users' character lists
+
+# Tables whose rows belong to a single character, and the column saying which
+CHARACTER_TABLES = {
+    "characters": "id",
+    "characterholdings": "character_id",
+}
+
+_MISSING = object()
+
+
+def dump_row(row):
+    # Cached values outlive their session, so keep plain dicts, not ORM objects
+    return row.model_dump() if row is not None else None
+
+
+def dump_rows(rows) -> list:
+    return [row.model_dump() for row in rows]
+
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CharacterCache:
+    """
+    Per-character and per-user data that only changes when the user edits
+    it: the character row, its holdings, and each user's character
+    list. Entries are dropped when a commit touches the character (see the
+    Session hooks below, and the character_changes NOTIFY for commits made
+    by other instances). Both halves are LRUs, so memory stays bounded.
+
+    Each key has a generation that goes up when it's invalidated. A load
+    only stores its result if the generation hasn't moved while it ran, so a
+    write that lands mid-load can't leave a stale value behind.
+    """
+
+    def __init__(self, max_characters: int = CHARACTER_CACHE_SIZE, max_users: int = USER_CACHE_SIZE):
+        self.characters = LRUCache(max_characters)  # character id -> {section: value}
+        self.users = LRUCache(max_users)  # user id -> list of characters
+        self.owners = LRUCache(max_characters * 4)  # character id -> user id, for invalidating lists
+        self.generations = LRUCache(max(max_characters, max_users) * 4)
+        self._lock = threading.Lock()
+        # Off while we can't hear about other instances' writes; see TableChangeListener
+        self.enabled = True
+        # Called with the ids of invalidated characters, or None for all of them
+        self.listeners = []
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, session, key, cache, cache_key, section, loader, version=None):
+        generation = self.generations.get(key, 0)
+
+        def load():
+            value = loader(session)
+            with self._lock:
+                if self.generations.get(key, 0) == generation:
+                    if section is None:
+                        cache.set(cache_key, value)
+                    else:
+                        sections = cache.get(cache_key, None)
+                        if sections is None:
+                            sections = {}
+                            cache.set(cache_key, sections)
+                        sections[section] = (version, value)
+            return value
+
+        self.misses += 1
+        return flights.do((key, section, version, generation), load)
+
+    def character_section(self, session: Session, character_id: int, section: str, loader, version=None):
+        """
+        loader(session) for one part of a character's data (e.g. "character",
+        "armor"), cached until the character changes. Sections that join in
+        catalog rows pass that table's version too, so catalog edits show up.
+        Loaders must return plain data, not ORM objects.
+        """
+        if not self.enabled:
+            return loader(session)
+        sections = self.characters.get(character_id, None)
+        cached = sections.get(section) if sections is not None else None
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        return self._load(session, ("character", character_id), self.characters, character_id, section, loader, version)
+
+    def user_characters(self, session: Session, user_id: str, loader):
+        if not self.enabled:
+            return loader(session)
+        value = self.users.get(user_id)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        value = self._load(session, ("user", user_id), self.users, user_id, None, loader)
+        for character in value:
+            self.owners.set(character["id"], user_id)
+        return value
+
+    def _bump(self, key):
+        self.generations.set(key, self.generations.get(key, 0) + 1)
+
+    def invalidate(self, character_ids=(), user_ids=()):
+        with self._lock:
+            user_ids = set(user_ids)
+            for character_id in character_ids:
+                self._bump(("character", character_id))
+                self.characters.pop(character_id)
+                owner = self.owners.get(character_id, None)
+                if owner is not None:
+                    user_ids.add(owner)
+            for user_id in user_ids:
+                self._bump(("user", user_id))
+                self.users.pop(user_id)
+        if character_ids:
+            self._notify(set(character_ids))
+
+    def invalidate_all(self):
+        with self._lock:
+            self.characters.clear()
+            self.users.clear()
+            self.generations.clear()
+        self._notify(None)
+
+    def on_invalidate(self, listener):
+        self.listeners.append(listener)
+        return listener
+
+    def _notify(self, character_ids):
+        for listener in self.listeners:
+            try:
+                listener(character_ids)
+            except Exception:
+                logger.exception("Character invalidation listener failed")
+
+    def stats(self) -> dict:
+        return {"characters": len(self.characters), "users": len(self.users), "hits": self.hits, "misses": self.misses}
+
+
+character_cache = CharacterCache()
+
+
+def apply_character_change(payload: str):
+    # A character_changes NOTIFY, sent by the notify_character_change trigger
+    try:
+        change = json.loads(payload)
+        character_id, user_id = change["character"], change.get("user")
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring malformed character change notification: %r", payload)
+        return
+    character_cache.invalidate(
+        character_ids=[character_id] if character_id is not None else [],
+        user_ids=[user_id] if user_id is not None else [],
+    )
+
+
+# Track which characters each session writes to and invalidate them once it
+# commits, so the writer sees its own changes straight away
+def _changes(session) -> dict:
+    return session.info.setdefault("changed_characters", {"characters": set(), "users": set(), "all": False})
+
+
+def _old_and_new(obj, attribute: str):
+    history = inspect(obj).attrs[attribute].history
+    return {getattr(obj, attribute), *history.deleted} - {None}
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_characters(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table == "characters":
+            _changes(session)["characters"].update(_old_and_new(obj, "id"))
+            _changes(session)["users"].update(_old_and_new(obj, "user_id"))
+        elif table in CHARACTER_TABLES:
+            _changes(session)["characters"].update(_old_and_new(obj, "character_id"))
+
+
+def _ids_from_where(statement, table: str, column: str):
+    # The values `column` is compared to with == in the WHERE clause, or None
+    # if the statement isn't limited that way
+    if statement.whereclause is None:
+        return None
+    ids = set()
+    for element in visitors.iterate(statement.whereclause):
+        if (
+            isinstance(element, BinaryExpression)
+            and element.operator is operators.eq
+            and getattr(element.left, "name", None) == column
+            and getattr(getattr(element.left, "table", None), "name", None) == table
+            and isinstance(element.right, BindParameter)
+        ):
+            ids.add(element.right.effective_value)
+    return ids or None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_character_statements(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    table = mapper.local_table.name if mapper is not None else None
+    if table not in CHARACTER_TABLES:
+        return
+
+    changes = _changes(orm_execute_state.session)
+    column = CHARACTER_TABLES[table]
+    if orm_execute_state.is_insert:
+        rows = orm_execute_state.parameters
+        rows = rows if isinstance(rows, list) else [rows or {}]
+        if table == "characters":
+            changes["users"].update(row.get("user_id") for row in rows if row.get("user_id"))
+        else:
+            changes["characters"].update(row.get(column) for row in rows if row.get(column) is not None)
+        return
+
+    ids = _ids_from_where(orm_execute_state.statement, table, column)
+    if ids is None:
+        changes["all"] = True
+    else:
+        changes["characters"].update(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_characters(session):
+    changes = session.info.pop("changed_characters", None)
+    if not changes:
+        return
+    if changes["all"]:
+        character_cache.invalidate_all()
+    else:
+        character_cache.invalidate(changes["characters"], changes["users"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_characters(session):
+    session.info.pop("changed_characters", None)
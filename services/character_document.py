@@ -0,0 +1,104 @@
+from sqlalchemy import and_
+from sqlmodel import Session, select
+from models import Armor, Character, CharacterHolding, Feat, HOLDING_KINDS, HOLDING_LISTS, Spell, Weapon
+from services.catalog_cache import table_version
+from services.character_cache import character_cache, dump_row
+
+# Sections listing a character's holdings, and the kind of holding each lists
+HOLDING_SECTIONS = {
+    "armor": "armor",
+    "weapons": "weapon",
+    "feats": "feat",
+    "spells": "spell",
+    "inventory": "equipment",
+    "money": "money",
+    "skills": "skill",
+    "stats": "stat",
+}
+
+# Kinds shown as their catalog rows rather than as links
+CATALOG_KINDS = {"armor": Armor, "weapon": Weapon, "feat": Feat, "spell": Spell}
+
+# Everything shown for a character
+SECTIONS = ("character", *HOLDING_SECTIONS)
+
+_SECTION_OF_KIND = {kind: section for section, kind in HOLDING_SECTIONS.items()}
+_CATALOG_COLUMN = {kind: i for i, kind in enumerate(CATALOG_KINDS)}
+
+
+def _holdings_query():
+    statement = select(CharacterHolding, *CATALOG_KINDS.values())
+    for kind, model in CATALOG_KINDS.items():
+        statement = statement.outerjoin(model, and_(CharacterHolding.kind == kind, model.id == CharacterHolding.ref_id))
+    return statement
+
+
+HOLDINGS_QUERY = _holdings_query()
+
+
+def load_holdings(session: Session, character_id: int) -> dict:
+    # Every holding section from one range scan of the holdings primary key,
+    # with the catalog rows of the kinds that show them joined in
+    sections = {section: [] for section in HOLDING_SECTIONS}
+    for holding, *catalog_rows in session.exec(HOLDINGS_QUERY.where(CharacterHolding.character_id == character_id)):
+        section = _SECTION_OF_KIND.get(holding.kind)
+        if section is None:
+            continue
+        if holding.kind in _CATALOG_COLUMN:
+            row = catalog_rows[_CATALOG_COLUMN[holding.kind]]
+            if row is not None:
+                sections[section].append(row.model_dump())
+        else:
+            sections[section].append(holding.as_link().model_dump())
+    return sections
+
+
+def holding_lists(session: Session, character_ids) -> dict:
+    """
+    character id -> the lists the character payload used to carry, built from
+    its holdings: catalog ids, or {"id": ..., ...} for kinds whose holdings
+    carry more (quantity, ranks, ...). One query for all the characters.
+    """
+    lists = {character_id: {field: [] for field in HOLDING_LISTS} for character_id in character_ids}
+    if not lists:
+        return lists
+    field_of_kind = {kind: field for field, kind in HOLDING_LISTS.items()}
+    holdings = session.exec(
+        select(CharacterHolding)
+        .where(CharacterHolding.character_id.in_(list(lists)))
+        .order_by(CharacterHolding.character_id, CharacterHolding.kind, CharacterHolding.ref_id)
+    ).all()
+    for holding in holdings:
+        field = field_of_kind.get(holding.kind)
+        if field is None:
+            continue
+        extra = holding.as_link().model_dump(exclude={"character_id", HOLDING_KINDS[holding.kind][1]})
+        lists[holding.character_id][field].append({"id": holding.ref_id, **extra} if extra else holding.ref_id)
+    return lists
+
+
+def character_section(session: Session, character_id: int, section: str):
+    if section == "character":
+        return character_cache.character_section(
+            session, character_id, section,
+            lambda session: dump_row(session.exec(select(Character).where(Character.id == character_id)).first()),
+        )
+    # The holding sections are loaded and cached together, and rebuilt when
+    # any of the catalog tables joined in changes
+    holdings = character_cache.character_section(
+        session, character_id, "holdings",
+        lambda session: load_holdings(session, character_id),
+        version=tuple(table_version(model.__tablename__) for model in CATALOG_KINDS.values()),
+    )
+    return holdings[section]
+
+
+def character_document(session: Session, character_id: int):
+    """Every section of the character, or None if it doesn't exist."""
+    character = character_section(session, character_id, "character")
+    if character is None:
+        return None
+    return {
+        section: character if section == "character" else character_section(session, character_id, section)
+        for section in SECTIONS
+    }
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from db import engine
+from services.character_cache import character_cache
+from services.character_document import character_document
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE", "15"))  # seconds
+RETRY_MILLISECONDS = 2000  # how soon browsers reconnect a dropped stream
+
+
+class CharacterEventHub:
+    """
+    In-process pub/sub of "this character changed". Subscribers are asyncio
+    Events owned by the stream's event loop; publishing is thread-safe, since
+    commits happen in the threadpool and other instances' writes arrive on
+    the TableChangeListener thread (via the character cache invalidations).
+    A burst of changes collapses into one wake-up per subscriber.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)  # character id -> {(loop, event)}
+        self._lock = threading.Lock()
+
+    def subscribe(self, character_id: int):
+        subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers[character_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, character_id: int, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(character_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[character_id]
+
+    def publish(self, character_ids=None):
+        # None means anything may have changed (e.g. a bulk write we couldn't
+        # narrow down), so everyone re-checks
+        with self._lock:
+            if character_ids is None:
+                subscribers = [s for group in self._subscribers.values() for s in group]
+            else:
+                subscribers = [s for character_id in character_ids for s in self._subscribers.get(character_id, ())]
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the stream's loop has already closed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"characters": len(self._subscribers), "streams": sum(len(s) for s in self._subscribers.values())}
+
+
+character_events = CharacterEventHub()
+character_cache.on_invalidate(character_events.publish)
+
+
+def document_diff(old: dict, new: dict) -> dict:
+    """
+    What changed between two character documents: the changed fields of the
+    character row, and any link section that changed, in full.
+    """
+    diff = {}
+    for section, value in new.items():
+        previous = old.get(section)
+        if value == previous:
+            continue
+        if section == "character" and previous is not None:
+            diff[section] = {field: field_value for field, field_value in value.items() if previous.get(field) != field_value}
+        else:
+            diff[section] = value
+    return diff
+
+
+def load_character_document(character_id: int):
+    # Its own short session: a stream can stay open for hours and mustn't
+    # hold a pooled connection while it waits
+    with Session(engine) as session:
+        return character_document(session, character_id)
+
+
+def _event(name: str, data) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+async def character_event_stream(character_id: int, request=None):
+    """
+    Server-sent events for one character: a "snapshot" of the whole document,
+    then a "patch" (see document_diff) after each change, and "deleted" if
+    the character goes away. Reloads come from the character cache, so tabs
+    watching the same character share one database read per change.
+    """
+    # Subscribe before taking the snapshot, so a write in between isn't missed
+    _, changed = subscription = character_events.subscribe(character_id)
+    try:
+        document = await run_in_threadpool(load_character_document, character_id)
+        if document is None:
+            yield _event("deleted", {"id": character_id})
+            return
+        yield f"retry: {RETRY_MILLISECONDS}\n" + _event("snapshot", document)
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                if request is not None and await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            changed.clear()
+
+            current = await run_in_threadpool(load_character_document, character_id)
+            if current is None:
+                yield _event("deleted", {"id": character_id})
+                return
+            diff = document_diff(document, current)
+            if diff:
+                document = current
+                yield _event("patch", diff)
+    finally:
+        character_events.unsubscribe(character_id, subscription)
@@ -0,0 +1,104 @@
+from collections import Counter
+from sqlalchemy import insert
+from sqlmodel import Session, select
+from models import Spell, Weapon, Armor, Equipment, CharacterHolding, CharacterSpellLink, CharacterWeaponLink, CharacterArmorLink, CharacterInventoryLink
+from services.catalog_cache import cached
+
+# Class kit column -> (catalog model, link model, link column for the item)
+KIT_COLUMNS = {
+    "starting_spells": (Spell, CharacterSpellLink, "spell_id"),
+    "starting_weapons": (Weapon, CharacterWeaponLink, "weapon_id"),
+    "starting_armor": (Armor, CharacterArmorLink, "armor_id"),
+    "starting_inventory": (Equipment, CharacterInventoryLink, "equipment_id"),
+}
+
+
+def _name_index(session: Session, model):
+    rows = session.exec(select(model.id, model.name)).all()
+    return {
+        "ids": frozenset(row.id for row in rows),
+        "names": {row.name.strip().lower(): row.id for row in rows if row.name},
+    }
+
+
+@cached("spells", "weapons", "armor", "equipment")
+def kit_catalog_index(session: Session):
+    # name/id lookups for every catalog a class kit can reference
+    return {model.__tablename__: _name_index(session, model) for model, _, _ in KIT_COLUMNS.values()}
+
+
+def _resolve_entry(entry, index):
+    # Kit entries may be an id, a name, or {"id"/"name": ..., "quantity": n}
+    quantity = 1
+    if isinstance(entry, dict):
+        try:
+            quantity = int(entry["quantity"]) if entry.get("quantity") is not None else 1
+        except (TypeError, ValueError):
+            # e.g. "quantity": "two"; reported with the unresolved entries
+            return None, quantity
+        if quantity < 1:
+            # A holding of 0 or -2 of something isn't one; report it the same way
+            return None, quantity
+        entry = entry.get("id", entry.get("name"))
+    if isinstance(entry, int):
+        return (entry if entry in index["ids"] else None), quantity
+    if isinstance(entry, str):
+        if entry.strip().isdigit() and int(entry) in index["ids"]:
+            return int(entry), quantity
+        return index["names"].get(entry.strip().lower()), quantity
+    return None, quantity
+
+
+def resolve_kit(session: Session, character_class):
+    """
+    Turns a class's starting_* lists into link rows grouped by link model.
+    Returns (rows_by_link_model, unresolved_entries).
+    """
+    index = kit_catalog_index(session)
+    rows = {}
+    unresolved = []
+
+    for column, (model, link_model, item_column) in KIT_COLUMNS.items():
+        counts = Counter()
+        for entry in getattr(character_class, column) or []:
+            item_id, quantity = _resolve_entry(entry, index[model.__tablename__])
+            if item_id is None:
+                unresolved.append({"kit": column, "entry": entry})
+            else:
+                counts[item_id] += quantity
+
+        if "quantity" in link_model.model_fields:
+            rows[link_model] = [{item_column: item_id, "quantity": quantity} for item_id, quantity in counts.items()]
+        else:
+            rows[link_model] = [{item_column: item_id} for item_id in counts]
+
+    return rows, unresolved
+
+
+def create_character_from_kit(session: Session, character, character_class):
+    """
+    Inserts the character and all of its starting kit links in one transaction,
+    with one multi-row INSERT into the holdings table.
+    """
+    rows, unresolved = resolve_kit(session, character_class)
+    try:
+        session.add(character)
+        session.flush()
+        holdings = [
+            CharacterHolding.from_link(link_model(character_id=character.id, **row)).model_dump()
+            for link_model, link_rows in rows.items()
+            for row in link_rows
+        ]
+        if holdings:
+            session.execute(insert(CharacterHolding), holdings)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    session.refresh(character)
+
+    return {
+        "character": character,
+        "links": {link_model.__name__.lower(): len(link_rows) for link_model, link_rows in rows.items()},
+        "unresolved": unresolved,
+    }
@@ -0,0 +1,158 @@
+import math
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+from models import Armor, Character, CharacterHolding, Race, Skill, Stat
+from services.catalog_cache import cached, table_version
+from services.character_cache import character_cache
+from services.progression import ability_modifier
+
+# Size modifier to AC (and attack rolls)
+SIZE_AC_MODIFIERS = {
+    "Fine": 8,
+    "Diminutive": 4,
+    "Tiny": 2,
+    "Small": 1,
+    "Medium": 0,
+    "Large": -1,
+    "Huge": -2,
+    "Gargantuan": -4,
+    "Colossal": -8,
+}
+
+# Base land speed by size, for races that don't say otherwise
+BASE_SPEEDS = {"Fine": 20, "Diminutive": 20, "Tiny": 20, "Small": 20}
+DEFAULT_SPEED = 30
+
+UNLIMITED_DEX = 999  # Armor.max_dex_bonus for "no limit"
+SHIELD_CATEGORY = "shield"
+
+# Armor section versions: the catalog tables the result is computed from
+DEFENSE_TABLES = ("armor", "races", "stats", "skills")
+
+_dex_holding = aliased(CharacterHolding)
+_dexterity = (
+    select(_dex_holding.value)
+    .join(Stat, Stat.id == _dex_holding.ref_id)
+    .where(
+        _dex_holding.character_id == Character.id,
+        _dex_holding.kind == "stat",
+        or_(func.lower(Stat.name) == "dexterity", func.upper(Stat.abbreviation) == "DEX"),
+    )
+    .limit(1)
+    .scalar_subquery()
+)
+
+# The character's size, Dexterity and everything it's wearing; one row per
+# equipped armor or shield, or a single row with no armor
+DEFENSE_QUERY = (
+    select(
+        Race.size_category,
+        _dexterity.label("dexterity"),
+        Armor.id.label("armor_id"),
+        Armor.name,
+        Armor.category,
+        Armor.armor_bonus,
+        Armor.max_dex_bonus,
+        Armor.armor_check_penalty,
+        Armor.arcane_spell_failure,
+        Armor.max_speed,
+    )
+    .select_from(Character)
+    .outerjoin(Race, Race.id == Character.race_id)
+    .outerjoin(CharacterHolding, and_(
+        CharacterHolding.character_id == Character.id,
+        CharacterHolding.kind == "armor",
+        CharacterHolding.equipped.is_(True),
+    ))
+    .outerjoin(Armor, Armor.id == CharacterHolding.ref_id)
+)
+
+
+@cached("skills", "stats")
+def armor_check_skills(session: Session):
+    # Armor check penalties apply to every Strength- and Dexterity-based skill
+    rows = session.exec(
+        select(Skill.id, Skill.name)
+        .join(Stat, Stat.id == Skill.modifying_stat_id)
+        .where(or_(
+            func.lower(Stat.name).in_(("strength", "dexterity")),
+            func.upper(Stat.abbreviation).in_(("STR", "DEX")),
+        ))
+        .order_by(Skill.id)
+    ).all()
+    return [{"skill_id": skill_id, "name": name} for skill_id, name in rows]
+
+
+def armored_speed(base_speed: int, max_speed) -> int:
+    # Armor.max_speed is the speed in that armor for a 30 ft. creature; slower
+    # and faster creatures are slowed by the same proportion, rounded up to 5 ft.
+    if max_speed is None or max_speed >= DEFAULT_SPEED:
+        return base_speed
+    return min(base_speed, math.ceil(base_speed * max_speed / DEFAULT_SPEED / 5) * 5)
+
+
+def _compute_defense(session: Session, character_id: int):
+    rows = session.exec(DEFENSE_QUERY.where(Character.id == character_id)).all()
+    if not rows:
+        return None
+
+    size = rows[0].size_category or "Medium"
+    dex_modifier = ability_modifier(rows[0].dexterity)
+    worn = [row for row in rows if row.armor_id is not None]
+
+    armor_bonus = shield_bonus = 0
+    max_dex = UNLIMITED_DEX
+    check_penalty = spell_failure = 0
+    speed = base_speed = BASE_SPEEDS.get(size, DEFAULT_SPEED)
+    for row in worn:
+        bonus = int(row.armor_bonus or 0)
+        if (row.category or "").strip().lower() == SHIELD_CATEGORY:
+            shield_bonus = max(shield_bonus, bonus)
+        else:
+            armor_bonus = max(armor_bonus, bonus)
+        if row.max_dex_bonus is not None:
+            max_dex = min(max_dex, int(row.max_dex_bonus))
+        # Stored either way round; it's always a penalty
+        check_penalty -= abs(int(row.armor_check_penalty or 0))
+        spell_failure += int(row.arcane_spell_failure or 0)
+        speed = min(speed, armored_speed(base_speed, row.max_speed))
+
+    size_modifier = SIZE_AC_MODIFIERS.get(size, 0)
+    dex_bonus = min(dex_modifier, max_dex)
+    return {
+        "character_id": character_id,
+        "armor_class": 10 + armor_bonus + shield_bonus + dex_bonus + size_modifier,
+        "touch": 10 + dex_bonus + size_modifier,
+        # Flat-footed loses a Dex bonus, but keeps a Dex penalty
+        "flat_footed": 10 + armor_bonus + shield_bonus + min(dex_bonus, 0) + size_modifier,
+        "armor_bonus": armor_bonus,
+        "shield_bonus": shield_bonus,
+        "dex_modifier": dex_modifier,
+        "max_dex_bonus": max_dex if max_dex < UNLIMITED_DEX else None,
+        "dex_bonus": dex_bonus,
+        "size": size,
+        "size_modifier": size_modifier,
+        "base_speed": base_speed,
+        "speed": speed,
+        "armor_check_penalty": check_penalty,
+        "arcane_spell_failure": min(spell_failure, 100),
+        "worn": [{"armor_id": row.armor_id, "name": row.name, "category": row.category} for row in worn],
+        "skill_penalties": [
+            {**skill, "penalty": check_penalty} for skill in armor_check_skills(session)
+        ] if check_penalty else [],
+    }
+
+
+def character_defense(session: Session, character_id: int):
+    """
+    AC, touch and flat-footed AC, the Dex cap, speed and armor check penalty
+    from the character's equipped armor and shield, or None if there's no
+    such character. Cached with the character's other sections, so it's
+    recomputed only when the character or the catalog tables it uses change.
+    """
+    return character_cache.character_section(
+        session, character_id, "defense",
+        lambda session: _compute_defense(session, character_id),
+        version=tuple(table_version(table) for table in DEFENSE_TABLES),
+    )
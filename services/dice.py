@@ -0,0 +1,284 @@
+import re
+from functools import lru_cache
+from itertools import accumulate
+from typing import NamedTuple, Tuple
+from sqlmodel import Session, select
+from models import Weapon
+from services.cache_backend import register_type
+from services.catalog_cache import cached
+
+MAX_DICE = 100
+MAX_SIDES = 100
+MAX_PAIRS = 1_000_000  # outcome pairs combined by one + or *, so bad data can't pin a worker
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_TOKEN = re.compile(r"\s*(?:(\d*)d(\d+)|(\d+)|([-+*()]))", re.IGNORECASE)
+# A critical multiplier written after the damage, as in "1d8 x3". It says
+# what a critical hit does, not what a normal hit deals, so it's dropped.
+_CRITICAL_MULTIPLIER = re.compile(r"\s*[x×]\s*\d+\s*$", re.IGNORECASE)
+
+
+class DiceError(ValueError):
+    pass
+
+
+# Expression tree
+class Dice(NamedTuple):
+    count: int
+    sides: int
+
+
+class Constant(NamedTuple):
+    value: int
+
+
+class Operation(NamedTuple):
+    operator: str  # "+", "-" or "*"
+    left: tuple
+    right: tuple
+
+
+class Negate(NamedTuple):
+    operand: tuple
+
+
+def _tokenize(expression: str) -> list:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise DiceError(f"Unexpected {expression[position:].strip()!r} in {expression!r}")
+        count, sides, number, symbol = match.groups()
+        if sides is not None:
+            dice = Dice(int(count or 1), int(sides))
+            if not (1 <= dice.count <= MAX_DICE and 1 <= dice.sides <= MAX_SIDES):
+                raise DiceError(f"{match.group().strip()} is outside 1-{MAX_DICE} dice of 1-{MAX_SIDES} sides")
+            tokens.append(dice)
+        elif number is not None:
+            tokens.append(Constant(int(number)))
+        else:
+            tokens.append(symbol)
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    # expression := term (("+" | "-") term)*
+    # term       := unary ("*" unary)*
+    # unary      := "-" unary | NdM | N | "(" expression ")"
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise DiceError(f"{self.expression!r} ends too early")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self._expression()
+        if self._peek() is not None:
+            raise DiceError(f"Unexpected {self._peek()!r} in {self.expression!r}")
+        return node
+
+    def _expression(self):
+        node = self._term()
+        while self._peek() in ("+", "-"):
+            node = Operation(self._next(), node, self._term())
+        return node
+
+    def _term(self):
+        node = self._unary()
+        while self._peek() == "*":
+            self._next()
+            node = Operation("*", node, self._unary())
+        return node
+
+    def _unary(self):
+        token = self._next()
+        if token == "-":
+            return Negate(self._unary())
+        if token == "(":
+            node = self._expression()
+            if self._next() != ")":
+                raise DiceError(f"Unbalanced parentheses in {self.expression!r}")
+            return node
+        if isinstance(token, (Dice, Constant)):
+            return token
+        raise DiceError(f"Unexpected {token!r} in {self.expression!r}")
+
+
+@lru_cache(maxsize=1024)
+def compile_dice(expression: str) -> tuple:
+    """
+    The expression tree for a dice expression like "2d6+3" or "(1d4+1)*2".
+    Double weapons list one expression per head ("1d6/1d6"), so this
+    returns a tuple of trees, one per head. A trailing critical multiplier
+    ("1d8 x3") is ignored.
+    """
+    heads = [_CRITICAL_MULTIPLIER.sub("", head) for head in (expression or "").split("/")]
+    heads = [head for head in heads if head.strip()]
+    if not heads:
+        raise DiceError("Empty dice expression")
+    return tuple(_Parser(head).parse() for head in heads)
+
+
+@register_type
+class Distribution(NamedTuple):
+    """
+    Exact distribution of an integer roll: counts[i] of the equally likely
+    outcomes come out as minimum + i.
+    """
+    minimum: int
+    counts: Tuple[int, ...]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def maximum(self) -> int:
+        return self.minimum + len(self.counts) - 1
+
+
+def _check_size(a: tuple, b: tuple):
+    if len(a) * len(b) > MAX_PAIRS:
+        raise DiceError("Dice expression has too many outcomes")
+
+
+def _convolve(a: tuple, b: tuple) -> tuple:
+    _check_size(a, b)
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return tuple(out)
+
+
+def add(a: Distribution, b: Distribution) -> Distribution:
+    return Distribution(a.minimum + b.minimum, _convolve(a.counts, b.counts))
+
+
+def negate(a: Distribution) -> Distribution:
+    return Distribution(-a.maximum, a.counts[::-1])
+
+
+def multiply(a: Distribution, b: Distribution) -> Distribution:
+    _check_size(a.counts, b.counts)
+    products = {}
+    for i, x in enumerate(a.counts):
+        for j, y in enumerate(b.counts):
+            if x and y:
+                value = (a.minimum + i) * (b.minimum + j)
+                products[value] = products.get(value, 0) + x * y
+    low, high = min(products), max(products)
+    return Distribution(low, tuple(products.get(value, 0) for value in range(low, high + 1)))
+
+
+def shift(a: Distribution, amount: int, floor: int = None) -> Distribution:
+    # Adds a flat bonus; results below `floor` are counted as `floor`
+    # (a hit always deals at least 1 damage)
+    a = Distribution(a.minimum + amount, a.counts)
+    if floor is None or a.minimum >= floor:
+        return a
+    if a.maximum <= floor:
+        return Distribution(floor, (a.total,))
+    cut = floor - a.minimum
+    return Distribution(floor, (sum(a.counts[:cut + 1]),) + a.counts[cut + 1:])
+
+
+@lru_cache(maxsize=256)
+def _dice(count: int, sides: int) -> Distribution:
+    # Adding one die is a sliding-window sum over the counts so far, done
+    # with prefix sums: linear in the number of outcomes rather than a full
+    # convolution per die
+    counts = (1,)
+    for _ in range(count):
+        prefix = (0, *accumulate(counts))
+        length = len(counts)
+        counts = tuple(prefix[min(k + 1, length)] - prefix[max(0, k - sides + 1)] for k in range(length + sides - 1))
+    return Distribution(count, counts)
+
+
+def _evaluate(node) -> Distribution:
+    if isinstance(node, Dice):
+        return _dice(node.count, node.sides)
+    if isinstance(node, Constant):
+        return Distribution(node.value, (1,))
+    if isinstance(node, Negate):
+        return negate(_evaluate(node.operand))
+    left, right = _evaluate(node.left), _evaluate(node.right)
+    if node.operator == "+":
+        return add(left, right)
+    if node.operator == "-":
+        return add(left, negate(right))
+    return multiply(left, right)
+
+
+@lru_cache(maxsize=1024)
+def dice_distributions(expression: str) -> tuple:
+    """One Distribution per head of the expression (see compile_dice)."""
+    return tuple(_evaluate(tree) for tree in compile_dice(expression))
+
+
+def distribution_stats(distribution: Distribution) -> dict:
+    total = distribution.total
+    values = range(distribution.minimum, distribution.maximum + 1)
+    mean = sum(value * count for value, count in zip(values, distribution.counts)) / total
+    variance = sum((value - mean) ** 2 * count for value, count in zip(values, distribution.counts)) / total
+
+    percentiles, cumulative, wanted = {}, 0, list(PERCENTILES)
+    for value, count in zip(values, distribution.counts):
+        cumulative += count
+        while wanted and cumulative * 100 >= wanted[0] * total:
+            percentiles[str(wanted.pop(0))] = value
+    return {
+        "min": distribution.minimum,
+        "max": distribution.maximum,
+        "mean": round(mean, 4),
+        "variance": round(variance, 4),
+        "std_dev": round(variance ** 0.5, 4),
+        "percentiles": percentiles,
+        "distribution": {value: round(count / total, 6) for value, count in zip(values, distribution.counts) if count},
+    }
+
+
+# One entry for the whole table, rather than one per weapon id asked for,
+# so ids that don't exist don't each take up a place in the cache
+@cached("weapons")
+def weapon_damage_dice(session: Session) -> dict:
+    """Every weapon's damage_dice, by weapon id."""
+    return dict(session.exec(select(Weapon.id, Weapon.damage_dice)).all())
+
+
+def weapon_damage(session: Session, weapon_id: int):
+    """
+    (damage_dice, distributions per head) for a weapon, or None if there's
+    no such weapon. Raises DiceError if its damage_dice can't be read.
+    """
+    damage_dice = weapon_damage_dice(session)
+    if weapon_id not in damage_dice:
+        return None
+    return damage_dice[weapon_id], dice_distributions(damage_dice[weapon_id] or "")
+
+
+def weapon_damage_stats(session: Session, weapon_id: int, bonus: int = 0):
+    damage = weapon_damage(session, weapon_id)
+    if damage is None:
+        return None
+    damage_dice, distributions = damage
+    return {
+        "weapon_id": weapon_id,
+        "damage_dice": damage_dice,
+        "bonus": bonus,
+        "heads": [distribution_stats(shift(distribution, bonus, floor=1)) for distribution in distributions],
+    }
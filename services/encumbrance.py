@@ -0,0 +1,161 @@
+from sqlalchemy import text
+from sqlmodel import Session
+
+# Light / medium / heavy load limits (lbs.) for Strength scores 1-29, from the
+# Pathfinder carrying capacity table. Past 29 every +10 Strength multiplies by 4.
+CARRYING_CAPACITY = {
+    1: (3, 6, 10),
+    2: (6, 13, 20),
+    3: (10, 20, 30),
+    4: (13, 26, 40),
+    5: (16, 33, 50),
+    6: (20, 40, 60),
+    7: (23, 46, 70),
+    8: (26, 53, 80),
+    9: (30, 60, 90),
+    10: (33, 66, 100),
+    11: (38, 76, 115),
+    12: (43, 86, 130),
+    13: (50, 100, 150),
+    14: (58, 116, 175),
+    15: (66, 133, 200),
+    16: (76, 153, 230),
+    17: (86, 173, 260),
+    18: (100, 200, 300),
+    19: (116, 233, 350),
+    20: (133, 266, 400),
+    21: (153, 306, 460),
+    22: (173, 346, 520),
+    23: (200, 400, 600),
+    24: (233, 466, 700),
+    25: (266, 533, 800),
+    26: (306, 613, 920),
+    27: (346, 693, 1040),
+    28: (400, 800, 1200),
+    29: (466, 933, 1400),
+}
+
+SIZE_MULTIPLIERS = {
+    "Fine": 0.125,
+    "Diminutive": 0.25,
+    "Tiny": 0.5,
+    "Small": 0.75,
+    "Medium": 1,
+    "Large": 2,
+    "Huge": 4,
+    "Gargantuan": 8,
+    "Colossal": 16,
+}
+
+# Every weighted holding of a character in one statement. Inventory items are
+# walked from the top-level items down through `container_id`, so each item is
+# counted once and rolled up under the outermost container that holds it. The
+# path array stops the walk if bad data ever puts a container inside itself,
+# and items on such a cycle (in themselves, or A in B and B in A), which no
+# top-level item leads to, are counted as top-level items of their own.
+LOAD_QUERY = text("""
+    WITH RECURSIVE inventory AS (
+        SELECT l.ref_id AS equipment_id, l.container_id,
+               COALESCE(l.quantity, 1) * COALESCE(e.weight, 0) AS weight
+        FROM characterholdings l
+        JOIN equipment e ON e.id = l.ref_id
+        WHERE l.character_id = :character_id AND l.kind = 'equipment'
+    ),
+    contents AS (
+        SELECT equipment_id, equipment_id AS root_id, weight, ARRAY[equipment_id] AS path
+        FROM inventory
+        WHERE container_id IS NULL
+           OR container_id NOT IN (SELECT equipment_id FROM inventory)
+        UNION ALL
+        SELECT i.equipment_id, c.root_id, i.weight, c.path || i.equipment_id
+        FROM inventory i
+        JOIN contents c ON i.container_id = c.equipment_id
+        WHERE i.equipment_id <> ALL(c.path)
+    )
+    SELECT 'equipment' AS kind, root_id, SUM(weight) AS weight
+    FROM (
+        SELECT root_id, weight FROM contents
+        UNION ALL
+        SELECT equipment_id, weight FROM inventory
+        WHERE equipment_id NOT IN (SELECT equipment_id FROM contents)
+    ) items
+    GROUP BY root_id
+    UNION ALL
+    SELECT 'weapons', NULL, SUM(COALESCE(l.quantity, 1) * COALESCE(w.weight, 0))
+    FROM characterholdings l
+    JOIN weapons w ON w.id = l.ref_id
+    WHERE l.character_id = :character_id AND l.kind = 'weapon'
+    UNION ALL
+    SELECT 'armor', NULL, SUM(COALESCE(l.quantity, 1) * COALESCE(a.weight, 0))
+    FROM characterholdings l
+    JOIN armor a ON a.id = l.ref_id
+    WHERE l.character_id = :character_id AND l.kind = 'armor'
+""")
+
+STRENGTH_QUERY = text("""
+    SELECT s.value AS strength, r.size_category
+    FROM characters c
+    LEFT JOIN races r ON r.id = c.race_id
+    LEFT JOIN characterholdings s ON s.character_id = c.id
+        AND s.kind = 'stat'
+        AND s.ref_id IN (
+            SELECT id FROM stats
+            WHERE lower(name) = 'strength' OR upper(abbreviation) = 'STR'
+        )
+    WHERE c.id = :character_id
+""")
+
+
+def carrying_capacity(strength: int, size_category: str = "Medium"):
+    strength = max(strength, 1)
+    multiplier = 1
+    while strength > 29:
+        strength -= 10
+        multiplier *= 4
+    multiplier *= SIZE_MULTIPLIERS.get(size_category or "Medium", 1)
+    return tuple(limit * multiplier for limit in CARRYING_CAPACITY[strength])
+
+
+def load_tier(total_weight: float, capacity) -> str:
+    light, medium, heavy = capacity
+    if total_weight <= light:
+        return "Light"
+    if total_weight <= medium:
+        return "Medium"
+    if total_weight <= heavy:
+        return "Heavy"
+    return "Overloaded"
+
+
+def get_character_load(session: Session, character_id: int):
+    """
+    Returns the total carried weight and load tier for a character, or None
+    if the character does not exist.
+    """
+    character = session.execute(STRENGTH_QUERY, {"character_id": character_id}).first()
+    if character is None:
+        return None
+
+    totals = {"equipment": 0.0, "weapons": 0.0, "armor": 0.0}
+    containers = []
+    for kind, root_id, weight in session.execute(LOAD_QUERY, {"character_id": character_id}):
+        weight = float(weight or 0)
+        totals[kind] += weight
+        if kind == "equipment":
+            containers.append({"equipment_id": root_id, "weight": weight})
+
+    total_weight = sum(totals.values())
+    strength = character.strength if character.strength is not None else 10
+    capacity = carrying_capacity(strength, character.size_category)
+
+    return {
+        "character_id": character_id,
+        "total_weight": total_weight,
+        "weight_by_kind": totals,
+        "top_level_items": containers,
+        "strength": strength,
+        "light_load": capacity[0],
+        "medium_load": capacity[1],
+        "heavy_load": capacity[2],
+        "load": load_tier(total_weight, capacity),
+    }
@@ -0,0 +1,202 @@
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+from sqlmodel import Session, select
+from models import Feat
+from services.catalog_cache import cached
+
+logger = logging.getLogger(__name__)
+
+
+def iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _key(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isdigit() else value.lower()
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise TypeError(f"not an id or name: {value!r}")
+
+
+def _parse_prerequisite(entry):
+    # Plain strings are feat names; everything else is a {"kind": value} dict.
+    # Raises TypeError or ValueError if the entry can't be read.
+    if isinstance(entry, str):
+        return "feat", _key(entry), None
+    if not isinstance(entry, dict):
+        return None, None, None
+    if "feat" in entry or "feat_id" in entry:
+        return "feat", _key(entry.get("feat", entry.get("feat_id"))), None
+    if "stat" in entry:
+        return "stat", _key(entry["stat"]), int(entry.get("min", entry.get("value", 0)))
+    if "bab" in entry:
+        return "bab", None, int(entry["bab"])
+    if "level" in entry:
+        return "level", None, int(entry["level"])
+    if "class" in entry or "class_id" in entry:
+        return "class", _key(entry.get("class", entry.get("class_id"))), None
+    return None, None, None
+
+
+class _Thresholds:
+    """
+    Bitsets of feats needing at least some value of one requirement, so the
+    feats blocked by a character's value are found with one bisect.
+    """
+
+    def __init__(self, minimums: dict):
+        by_value = defaultdict(int)
+        for index, minimum in minimums.items():
+            by_value[minimum] |= 1 << index
+        self.values = sorted(by_value)
+        self.above = [0] * (len(self.values) + 1)
+        for i in range(len(self.values) - 1, -1, -1):
+            self.above[i] = self.above[i + 1] | by_value[self.values[i]]
+
+    def blocked(self, value) -> int:
+        return self.above[bisect_right(self.values, value if value is not None else 0)]
+
+
+class FeatGraph:
+    def __init__(self, feats):
+        self.feats = [feat.model_dump() for feat in feats]
+        self.index = {feat.id: i for i, feat in enumerate(feats)}
+        self.all_bits = (1 << len(feats)) - 1
+
+        names = {feat.name.strip().lower(): i for i, feat in enumerate(feats) if feat.name}
+        direct = [[] for _ in feats]
+        stats = [{} for _ in feats]
+        bab = [0] * len(feats)
+        level = [feat.level_requirement or 1 for feat in feats]
+        classes = [set() for _ in feats]
+
+        for i, feat in enumerate(feats):
+            prerequisites = feat.prerequisites or []
+            if not isinstance(prerequisites, list):
+                logger.warning("Ignoring prerequisites of feat %s, which aren't a list: %r", feat.id, prerequisites)
+                prerequisites = []
+            for entry in prerequisites:
+                # Entries are typed in by hand; one bad one shouldn't stop the
+                # graph (and every endpoint that needs it) from being built
+                try:
+                    kind, key, value = _parse_prerequisite(entry)
+                except (TypeError, ValueError):
+                    logger.warning("Ignoring unreadable prerequisite of feat %s: %r", feat.id, entry)
+                    continue
+                if kind == "feat":
+                    parent = self.index.get(key) if isinstance(key, int) else names.get(key)
+                    if parent is not None and parent != i:
+                        direct[i].append(parent)
+                elif kind == "stat":
+                    stats[i][key] = max(stats[i].get(key, 0), value)
+                elif kind == "bab":
+                    bab[i] = max(bab[i], value)
+                elif kind == "level":
+                    level[i] = max(level[i], value)
+                elif kind == "class":
+                    classes[i].add(key)
+
+        # Transitive closure: closure[i] holds every feat i needs, directly or
+        # not. The other requirements are inherited along the same edges.
+        # Passes run in topological order, so a DAG settles in one pass; the
+        # loop only repeats when bad data has introduced a cycle.
+        self.closure = [0] * len(feats)
+        order = self._topological_order(direct)
+        changed = True
+        while changed:
+            changed = False
+            for i in order:
+                bits = self.closure[i]
+                for parent in direct[i]:
+                    bits |= self.closure[parent] | (1 << parent)
+                    for stat, minimum in stats[parent].items():
+                        if minimum > stats[i].get(stat, 0):
+                            stats[i][stat] = minimum
+                            changed = True
+                    if bab[parent] > bab[i] or level[parent] > level[i] or not classes[parent] <= classes[i]:
+                        bab[i] = max(bab[i], bab[parent])
+                        level[i] = max(level[i], level[parent])
+                        classes[i] |= classes[parent]
+                        changed = True
+                if bits != self.closure[i]:
+                    self.closure[i] = bits
+                    changed = True
+
+        # dependents[p]: every feat that needs p somewhere in its closure
+        self.dependents = defaultdict(int)
+        for i, bits in enumerate(self.closure):
+            for parent in iter_bits(bits):
+                self.dependents[parent] |= 1 << i
+        self.prerequisite_bits = 0
+        for parent in self.dependents:
+            self.prerequisite_bits |= 1 << parent
+
+        stat_minimums = defaultdict(dict)
+        for i, requirements in enumerate(stats):
+            for stat, minimum in requirements.items():
+                stat_minimums[stat][i] = minimum
+        self.stat_thresholds = {stat: _Thresholds(minimums) for stat, minimums in stat_minimums.items()}
+        self.bab_thresholds = _Thresholds({i: value for i, value in enumerate(bab) if value})
+        self.level_thresholds = _Thresholds(dict(enumerate(level)))
+
+        self.class_bits = defaultdict(int)
+        for i, required in enumerate(classes):
+            for key in required:
+                self.class_bits[key] |= 1 << i
+
+    @staticmethod
+    def _topological_order(direct):
+        children = defaultdict(list)
+        waiting = [len(parents) for parents in direct]
+        for i, parents in enumerate(direct):
+            for parent in parents:
+                children[parent].append(i)
+        order = [i for i, count in enumerate(waiting) if count == 0]
+        for i in order:
+            for child in children[i]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    order.append(child)
+        seen = set(order)
+        return order + [i for i in range(len(direct)) if i not in seen]
+
+    def bits_for(self, feat_ids) -> int:
+        bits = 0
+        for feat_id in feat_ids:
+            if feat_id in self.index:
+                bits |= 1 << self.index[feat_id]
+        return bits
+
+    def eligible(self, owned_ids, scores: dict, bab: int, level: int, class_keys) -> int:
+        """
+        Bitset of feats the character doesn't have yet and meets every
+        prerequisite for.
+        """
+        owned = self.bits_for(owned_ids)
+        blocked = owned
+
+        for missing in iter_bits(self.prerequisite_bits & ~owned):
+            blocked |= self.dependents[missing]
+        for stat, thresholds in self.stat_thresholds.items():
+            blocked |= thresholds.blocked(scores.get(stat))
+        blocked |= self.bab_thresholds.blocked(bab)
+        blocked |= self.level_thresholds.blocked(level)
+        for key, bits in self.class_bits.items():
+            if key not in class_keys:
+                blocked |= bits
+
+        return self.all_bits & ~blocked
+
+    def feats_for(self, bits: int):
+        return [self.feats[i] for i in iter_bits(bits)]
+
+
+@cached("feats")
+def feat_graph(session: Session) -> FeatGraph:
+    return FeatGraph(session.exec(select(Feat).order_by(Feat.id)).all())
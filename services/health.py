@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from db import engine
+from services.warmup import warm_state, warm_catalog_caches, sync_table_versions
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))  # seconds
+LOOP_LAG_INTERVAL = 0.25
+READY_CACHE_TTL = float(os.getenv("READY_CACHE_TTL", "5"))  # seconds
+
+loop_lag = {"last": 0.0, "max": 0.0}
+
+
+async def monitor_loop_lag():
+    # Sleep a fixed interval and see how late we wake up; a blocked event loop
+    # shows up as lag long before requests start timing out
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LOOP_LAG_INTERVAL
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(loop.time() - expected, 0.0)
+        loop_lag["last"] = lag
+        loop_lag["max"] = max(loop_lag["max"], lag)
+
+
+def liveness() -> tuple:
+    alive = loop_lag["last"] < LOOP_LAG_THRESHOLD
+    return alive, {
+        "status": "ok" if alive else "event loop lagging",
+        "loop_lag_seconds": round(loop_lag["last"], 4),
+        "max_loop_lag_seconds": round(loop_lag["max"], 4),
+    }
+
+
+_migration_heads = None
+
+
+def migration_heads() -> set:
+    global _migration_heads
+    if _migration_heads is None:
+        root = Path(__file__).resolve().parent.parent
+        config = Config(str(root / "alembic.ini"))
+        config.set_main_option("script_location", str(root / "migrations"))
+        _migration_heads = set(ScriptDirectory.from_config(config).get_heads())
+    return _migration_heads
+
+
+def _check_readiness() -> dict:
+    checks = {"database": False, "migrations": False, "caches": False}
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            checks["database"] = True
+            versions = {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+            checks["migrations"] = versions == migration_heads()
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+
+    # Retry a warm-up that failed at startup now that the database is back.
+    # The shared cache is optional, so failing to reach it doesn't fail the check.
+    if checks["database"] and not warm_state["versions"]:
+        warm_state["versions"] = sync_table_versions()
+    if checks["database"] and not warm_state["catalog"]:
+        warm_state["catalog"] = warm_catalog_caches()
+    checks["caches"] = bool(warm_state["catalog"])
+    return checks
+
+
+_ready_lock = threading.Lock()
+_ready_result = {"checked_at": None, "checks": None}
+
+
+def readiness() -> tuple:
+    """
+    Runs the readiness checks at most once per READY_CACHE_TTL, however many
+    probes come in; everyone else gets the cached result.
+    """
+    with _ready_lock:
+        checked_at = _ready_result["checked_at"]
+        if checked_at is None or time.monotonic() - checked_at > READY_CACHE_TTL:
+            _ready_result["checks"] = _check_readiness()
+            _ready_result["checked_at"] = time.monotonic()
+        checks = _ready_result["checks"]
+        age = time.monotonic() - _ready_result["checked_at"]
+
+    ready = all(checks.values())
+    return ready, {"status": "ready" if ready else "not ready", "checks": checks, "checked_seconds_ago": round(age, 3)}
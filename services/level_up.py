@@ -0,0 +1,100 @@
+from sqlalchemy import insert
+from sqlmodel import Session, select
+from models import Character, CharacterClass, CharacterHolding, CharacterFeatLink, CharacterSpellLink
+from services.ability_index import class_abilities
+from services.character_kit import kit_catalog_index
+from services.feat_graph import feat_graph
+from services.progression import ability_scores, ability_modifier, bab_table, base_attack_bonus, save_bonuses, spell_slots
+
+
+class LevelUpError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def level_up_character(session: Session, character_id: int, user_id: str, feat_ids=(), spell_ids=(), hp_roll=None):
+    """
+    Advances a character one level and adds the chosen feats and spells, all
+    in one transaction. Everything the client would otherwise look up (HP,
+    BAB, saves, new abilities and spell slots) is returned with the result.
+    Raises LevelUpError if the character can't level up as asked.
+    """
+    # Locked until the commit, so concurrent level-ups of one character run
+    # one after the other instead of both building on the same level
+    character = session.get(Character, character_id, with_for_update=True)
+    if not character:
+        raise LevelUpError(404, "Character not found")
+    if character.user_id != user_id:
+        raise LevelUpError(403, "You can only level up your own characters")
+
+    character_class = session.get(CharacterClass, character.character_class_id) if character.character_class_id else None
+    old_level = character.level or 1
+    new_level = old_level + 1
+    # Past the end of the progression tables every lookup would come back as 0
+    if new_level not in bab_table(session):
+        raise LevelUpError(400, f"Level {new_level} is past the highest level in the progression tables")
+    hit_die = (character_class.hit_die if character_class else None) or 6
+
+    if hp_roll is None:
+        hp_roll = hit_die // 2 + 1  # average roll, rounded up
+    elif not 1 <= hp_roll <= hit_die:
+        raise LevelUpError(400, f"HP roll must be between 1 and {hit_die}")
+
+    scores = ability_scores(session, character_id)
+    hp_gained = max(hp_roll + ability_modifier(scores.get("constitution", scores.get("con"))), 1)
+    bab = base_attack_bonus(session, character_class, new_level)
+
+    owned_feats = session.exec(
+        select(CharacterHolding.ref_id).where(CharacterHolding.character_id == character_id, CharacterHolding.kind == "feat")
+    ).all()
+    feat_ids = list(dict.fromkeys(feat_ids))
+    if feat_ids:
+        class_keys = {character_class.id, (character_class.name or "").strip().lower()} if character_class else set()
+        graph = feat_graph(session)
+        eligible = graph.eligible(owned_feats, scores, bab, new_level, class_keys)
+        not_eligible = [feat_id for feat_id in feat_ids if not graph.bits_for([feat_id]) & eligible]
+        if not_eligible:
+            raise LevelUpError(400, f"Feats not available to this character: {not_eligible}")
+
+    owned_spells = set(session.exec(
+        select(CharacterHolding.ref_id).where(CharacterHolding.character_id == character_id, CharacterHolding.kind == "spell")
+    ).all())
+    spell_ids = [spell_id for spell_id in dict.fromkeys(spell_ids) if spell_id not in owned_spells]
+    unknown_spells = [spell_id for spell_id in spell_ids if spell_id not in kit_catalog_index(session)["spells"]["ids"]]
+    if unknown_spells:
+        raise LevelUpError(404, f"Spells not found: {unknown_spells}")
+
+    old_slots = spell_slots(session, character_class, old_level)
+    new_slots = spell_slots(session, character_class, new_level)
+
+    try:
+        character.level = new_level
+        character.hit_points = (character.hit_points or 0) + hp_gained
+        holdings = [
+            *(CharacterFeatLink(character_id=character_id, feat_id=feat_id) for feat_id in feat_ids),
+            *(CharacterSpellLink(character_id=character_id, spell_id=spell_id) for spell_id in spell_ids),
+        ]
+        if holdings:
+            session.execute(insert(CharacterHolding), [CharacterHolding.from_link(link).model_dump() for link in holdings])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return {
+        "character_id": character_id,
+        "level": new_level,
+        "hp_gained": hp_gained,
+        "hit_points": character.hit_points,
+        "base_attack_bonus": bab,
+        "saves": save_bonuses(session, character_class, new_level),
+        "new_abilities": class_abilities(session, character.character_class_id, min_level=old_level, max_level=new_level),
+        "spells_per_day": new_slots["spells_per_day"],
+        "spells_known": new_slots["spells_known"],
+        "new_spells_per_day": [new - old for new, old in zip(new_slots["spells_per_day"], old_slots["spells_per_day"])],
+        "new_spells_known": [new - old for new, old in zip(new_slots["spells_known"], old_slots["spells_known"])],
+        "added_feats": feat_ids,
+        "added_spells": spell_ids,
+    }
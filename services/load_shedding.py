@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+
+# Request classes, lowest number served first when requests are queued
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# How long each class may wait for a slot before being shed (seconds)
+MAX_QUEUE_WAIT = {
+    HIGH: float(os.getenv("SHED_WAIT_HIGH", "2.0")),
+    NORMAL: float(os.getenv("SHED_WAIT_NORMAL", "1.0")),
+    LOW: float(os.getenv("SHED_WAIT_LOW", "0.25")),
+}
+
+# Cheap, cacheable reads that should keep working while we're overloaded
+CATALOG_PREFIXES = (
+    "/alignments", "/armor", "/bab_progressions", "/caster_types", "/catalog",
+    "/character_classes", "/character_creation_data", "/class_abilities",
+    "/equipment", "/feats", "/languages", "/money_values", "/races",
+    "/racial_traits", "/saving_throw_progressions", "/shop_items", "/skills",
+    "/spells", "/stats", "/weapons",
+)
+
+# Never queued or shed, so probes see the process as it is
+EXEMPT_PATHS = ("/healthz", "/readyz")
+
+# Long-lived event streams; they'd hold a slot for as long as they're open
+STREAM_SUFFIXES = ("/events",)
+
+
+# Every middleware built in this process, for the admin stats endpoint
+instances = []
+
+
+def request_priority(method: str, path: str) -> int:
+    if method in ("GET", "HEAD"):
+        return HIGH if path.startswith(CATALOG_PREFIXES) else NORMAL
+    return LOW
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit. Congestion is judged per route: each route keeps
+    a slowly rising minimum of its own latency, since a 2 ms cached read and
+    a 30 ms write are both normal. While requests finish close to their
+    route's baseline the limit grows by about one per window, but only while
+    it's actually being used. When the recent average of latency over
+    baseline climbs past `tolerance` (work is piling up behind the CPU or the
+    database), or requests fail, the limit is cut by 10%, at most once per
+    `window` seconds.
+    """
+
+    def __init__(self, initial=10, minimum=2, maximum=40, tolerance=2.0, backoff=0.9, window=0.5, clock=time.monotonic):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.clock = clock
+        self.baselines = {}  # route -> slowly rising minimum latency
+        self.gradient = 1.0  # moving average of latency / route baseline
+        self.latency = 0.0  # moving average of latency over all routes
+        self.last_decrease = float("-inf")
+
+    def record(self, latency: float, failed: bool = False, route=None, in_flight: int = 0):
+        now = self.clock()
+        baseline = self.baselines.get(route)
+        if baseline is None or latency < baseline:
+            baseline = latency
+        else:
+            # Let the baseline drift up so one lucky request doesn't pin it,
+            # slowly enough that a few seconds of congestion don't become it
+            baseline += (latency - baseline) * 0.001
+        self.baselines[route] = baseline
+        self.latency += (latency - self.latency) * 0.1
+        # Capped, so one cache miss on a fast route can't read as congestion
+        # on its own; latency that stays high for a while still does
+        ratio = min(latency / baseline, self.tolerance * 2) if baseline > 0 else 1.0
+        self.gradient += (ratio - self.gradient) * 0.1
+
+        if failed or self.gradient > self.tolerance:
+            if now - self.last_decrease > self.window:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.last_decrease = now
+        elif in_flight * 2 >= self.limit:
+            # Growing a limit nothing is pressing against would only let it
+            # run far past what the server can take before it's ever tested
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class LoadSheddingMiddleware:
+    """
+    Caps the requests in progress at an adaptive limit. Requests over the
+    limit wait in a priority queue (catalog reads first, writes last) and are
+    answered 503 with Retry-After once they've waited longer than their
+    class allows, instead of piling up in the threadpool until everything
+    times out.
+    """
+
+    def __init__(self, app, limit: AdaptiveLimit = None):
+        self.app = app
+        self.limit = limit or AdaptiveLimit(
+            initial=int(os.getenv("CONCURRENCY_INITIAL", "10")),
+            minimum=int(os.getenv("CONCURRENCY_MIN", "2")),
+            maximum=int(os.getenv("CONCURRENCY_MAX", "40")),
+        )
+        self.in_flight = 0
+        self.waiters = []
+        self.counter = itertools.count()
+        self.shed = 0
+        self.queue_delay = 0.0  # moving average of time spent waiting for a slot
+        instances.append(self)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["path"].endswith(STREAM_SUFFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], scope["path"])
+        if not await self._acquire(priority):
+            self.shed += 1
+            await self._reject(send, priority)
+            return
+
+        started = time.monotonic()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router has set the endpoint by now; requests that matched no
+            # route share a baseline per priority class
+            route = scope.get("endpoint") or priority
+            self.limit.record(time.monotonic() - started, failed=status["code"] >= 500, route=route, in_flight=self.in_flight)
+            self._release()
+
+    async def _acquire(self, priority: int) -> bool:
+        if self.in_flight < int(self.limit.limit) and not self.waiters:
+            self.in_flight += 1
+            return True
+
+        # Shed straight away if the requests ahead of this one would take
+        # longer than it's allowed to wait anyway
+        ahead = sum(1 for waiting_priority, _, _ in self.waiters if waiting_priority <= priority)
+        expected_wait = (ahead + 1) / self.limit.limit * self.limit.latency
+        if expected_wait > MAX_QUEUE_WAIT[priority]:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self.counter), waiter)
+        heapq.heappush(self.waiters, entry)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), MAX_QUEUE_WAIT[priority])
+            self.queue_delay += (time.monotonic() - queued_at - self.queue_delay) * 0.1
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(entry)
+            return False
+        except asyncio.CancelledError:
+            # The client went away while queued
+            self._abandon(entry)
+            raise
+
+    def _abandon(self, entry):
+        waiter = entry[2]
+        if waiter.done():
+            # A slot was handed over just as we gave up; pass it on
+            self._release()
+        else:
+            waiter.cancel()
+            self.waiters.remove(entry)
+            heapq.heapify(self.waiters)
+
+    def _release(self):
+        self.in_flight -= 1
+        # The limit may have grown as well, so admit as many waiters as fit
+        while self.waiters and self.in_flight < int(self.limit.limit):
+            _, _, waiter = heapq.heappop(self.waiters)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    async def _reject(self, send, priority: int):
+        retry_after = max(1, round(MAX_QUEUE_WAIT[priority]))
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(retry_after).encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "queue_delay": round(self.queue_delay, 4),
+            "mean_latency": round(self.limit.latency, 4),
+            "latency_gradient": round(self.limit.gradient, 3),
+            "shed": self.shed,
+        }
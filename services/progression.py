@@ -0,0 +1,121 @@
+from sqlmodel import Session, select
+from models import BABProgression, SavingThrowProgression, CharacterClass, CharacterHolding, Stat, CasterType
+from services.catalog_cache import cached
+
+# CharacterClass.bab_progression values -> BABProgression column
+BAB_COLUMNS = {
+    "high": "high",
+    "full": "high",
+    "good": "high",
+    "medium": "medium",
+    "average": "medium",
+    "low": "low",
+    "poor": "low",
+}
+
+
+@cached("bab_progressions")
+def bab_table(session: Session):
+    return {
+        row.level: {"high": row.high or 0, "medium": row.medium or 0, "low": row.low or 0}
+        for row in session.exec(select(BABProgression)).all()
+    }
+
+
+@cached("saving_throw_progressions")
+def save_table(session: Session):
+    return {
+        row.level: {"good_save": row.good_save or 0, "poor_save": row.poor_save or 0}
+        for row in session.exec(select(SavingThrowProgression)).all()
+    }
+
+
+@cached("caster_types")
+def spell_slot_table(session: Session):
+    """
+    (caster type, character level) -> spells per day and spells known for
+    spell levels 0-9. Also maps each caster_types row id to its type_id,
+    since classes point at a single caster_types row.
+    """
+    slots = {}
+    type_ids = {}
+    for row in session.exec(select(CasterType)).all():
+        type_id = row.type_id if row.type_id is not None else row.id
+        type_ids[row.id] = type_id
+        slots[(type_id, row.character_level)] = {
+            "spells_per_day": [getattr(row, f"spell_level_{i}") or 0 for i in range(10)],
+            "spells_known": [getattr(row, f"known_spell_level_{i}") or 0 for i in range(10)],
+        }
+    return {"slots": slots, "type_ids": type_ids}
+
+
+@cached("stats")
+def stat_keys(session: Session):
+    # stat id -> every lowercase name it can be referred to by
+    return {
+        stat.id: tuple(key.strip().lower() for key in (stat.name, stat.abbreviation) if key)
+        for stat in session.exec(select(Stat)).all()
+    }
+
+
+@cached("character_classes")
+def class_bab_progressions(session: Session):
+    return dict(session.exec(select(CharacterClass.id, CharacterClass.bab_progression)).all())
+
+
+def _bab(session: Session, progression, level: int) -> int:
+    column = BAB_COLUMNS.get((progression or "low").lower(), "low")
+    return bab_table(session).get(level, {}).get(column, 0)
+
+
+def base_attack_bonus(session: Session, character_class, level: int) -> int:
+    return _bab(session, character_class.bab_progression if character_class else None, level)
+
+
+def base_attack_bonus_for_class_id(session: Session, class_id, level: int) -> int:
+    # Same as base_attack_bonus, without loading the class row
+    return _bab(session, class_bab_progressions(session).get(class_id), level)
+
+
+def save_bonuses(session: Session, character_class, level: int) -> dict:
+    row = save_table(session).get(level, {})
+    saves = {}
+    for save in ("fort", "ref", "will"):
+        progression = (getattr(character_class, f"{save}_progression", None) if character_class else None) or "poor_save"
+        saves[save] = row.get(progression, row.get("poor_save", 0))
+    return saves
+
+
+def spell_slots(session: Session, character_class, level: int) -> dict:
+    empty = {"spells_per_day": [0] * 10, "spells_known": [0] * 10}
+    if not character_class or character_class.caster_type_id is None:
+        return empty
+    table = spell_slot_table(session)
+    type_id = table["type_ids"].get(character_class.caster_type_id, character_class.caster_type_id)
+    return table["slots"].get((type_id, level), empty)
+
+
+def ability_scores(session: Session, character_id: int) -> dict:
+    """
+    The character's stat values keyed by lowercase stat name and abbreviation,
+    e.g. {"strength": 14, "str": 14, ...}.
+    """
+    links = session.exec(
+        select(CharacterHolding.ref_id, CharacterHolding.value)
+        .where(CharacterHolding.character_id == character_id, CharacterHolding.kind == "stat")
+    ).all()
+    return scores_from_links(session, links)
+
+
+def scores_from_links(session: Session, links) -> dict:
+    # (stat id, value) pairs -> ability_scores' shape
+    keys = stat_keys(session)
+    scores = {}
+    for stat_id, value in links:
+        for key in keys.get(stat_id, ()):
+            scores[key] = value if value is not None else 10
+    return scores
+
+
+def ability_modifier(score) -> int:
+    return ((score if score is not None else 10) - 10) // 2
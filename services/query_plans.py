@@ -0,0 +1,127 @@
+import json
+import sys
+from sqlalchemy import JSON, Boolean, MetaData, Numeric, Integer, Table, text
+from models import HOLDING_KINDS
+
+SEED_ROWS = 5000
+SEED_USER = "plan-check"
+
+# The hot lookups, and the table each must reach through an index
+HOT_QUERIES = [
+    ("characters by user", "characters", "SELECT * FROM characters WHERE user_id = :user_id", {"user_id": f"{SEED_USER}-7"}),
+    ("holdings by character", "characterholdings", "SELECT * FROM characterholdings WHERE character_id = :character_id", {}),
+    ("holders of a feat", "characterholdings", "SELECT character_id FROM characterholdings WHERE kind = 'feat' AND ref_id = :feat_id", {}),
+    ("spells by level and school", "spells", "SELECT * FROM spells WHERE spell_level = 3 AND school = 'Evocation'", {}),
+    ("spells by class list", "spells", "SELECT * FROM spells WHERE class_lists @> '[\"Class7\"]'::jsonb", {}),
+]
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+
+def _placeholder(column_type):
+    if isinstance(column_type, Boolean):
+        return False
+    if isinstance(column_type, (Integer, Numeric)):
+        return 0
+    if isinstance(column_type, JSON):
+        return []
+    return "Plan check"
+
+
+def _seed_target(connection, table_name: str):
+    # A row of `table_name` for the seeded links to point at, with a
+    # placeholder in every column that must be filled in
+    table = Table(table_name, MetaData(), autoload_with=connection)
+    values = {
+        column.name: _placeholder(column.type)
+        for column in table.columns
+        if not column.nullable and column.server_default is None
+    }
+    return connection.execute(table.insert().values(**values).returning(table.c.id)).scalar()
+
+
+def seed(connection, rows: int = SEED_ROWS) -> dict:
+    """
+    Fills the hot tables with `rows` rows each, so the planner has a reason
+    to prefer an index. Returns the bind values for HOT_QUERIES. Meant to
+    run in a transaction that's rolled back afterwards.
+    """
+    connection.execute(text(
+        "INSERT INTO characters (name, user_id, wallet_copper)"
+        " SELECT 'Plan check', :user || '-' || g, 0 FROM generate_series(1, :rows) g"
+    ), {"user": SEED_USER, "rows": rows})
+    character_id = connection.execute(
+        text("SELECT id FROM characters WHERE user_id = :user_id"), {"user_id": f"{SEED_USER}-7"}
+    ).scalar()
+
+    # Every seeded character holds one of each kind; the extra feat is held
+    # by nobody, for the reverse lookup
+    for kind, (_, _, target_table) in HOLDING_KINDS.items():
+        connection.execute(text(
+            "INSERT INTO characterholdings (character_id, kind, ref_id)"
+            " SELECT id, :kind, :target FROM characters WHERE user_id LIKE :pattern"
+        ), {"kind": kind, "target": _seed_target(connection, target_table), "pattern": f"{SEED_USER}-%"})
+    feat_id = _seed_target(connection, "feats")
+
+    connection.execute(text(
+        "INSERT INTO spells (name, spell_level, school, class_lists)"
+        " SELECT 'Plan check', g % 10,"
+        " (ARRAY['Abjuration','Conjuration','Divination','Enchantment','Evocation','Illusion','Necromancy','Transmutation'])[g % 8 + 1],"
+        " jsonb_build_array('Class' || (g % 100))"
+        " FROM generate_series(1, :rows) g"
+    ), {"rows": rows})
+
+    # Bulk inserts sit in a GIN index's pending list until VACUUM merges
+    # them, which makes the index look far costlier than it'll be in use
+    connection.execute(text(
+        "SELECT gin_clean_pending_list(i.indexrelid) FROM pg_index i"
+        " JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am am ON am.oid = c.relam"
+        " WHERE i.indrelid = 'spells'::regclass AND am.amname = 'gin'"
+    ))
+    for table in ("characters", "spells", "characterholdings"):
+        connection.execute(text(f"ANALYZE {table}"))
+    return {"character_id": character_id, "feat_id": feat_id}
+
+
+def _scans(plan: dict, table: str):
+    if plan.get("Relation Name") == table:
+        yield plan["Node Type"]
+    for child in plan.get("Plans", ()):
+        yield from _scans(child, table)
+
+
+def check_query_plans(connection, rows: int = SEED_ROWS) -> list:
+    """
+    EXPLAINs each of HOT_QUERIES against seeded data and reports how it
+    reads its table. Everything runs in one transaction that's rolled back,
+    so it's safe on a shared database, though it briefly holds the catalog
+    change lock while seeding spells.
+    """
+    results = []
+    transaction = connection.begin()
+    try:
+        params = seed(connection, rows)
+        for name, table, query, query_params in HOT_QUERIES:
+            explain = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), {**params, **query_params}).scalar()
+            plan = (json.loads(explain) if isinstance(explain, str) else explain)[0]["Plan"]
+            scans = list(_scans(plan, table))
+            results.append({
+                "query": name,
+                "table": table,
+                "scans": scans,
+                "uses_index": bool(scans) and all(scan in INDEX_SCANS for scan in scans),
+            })
+    finally:
+        transaction.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    # python -m services.query_plans: exits 1 if a hot query would seq scan
+    from db import engine
+    engine.echo = False
+    with engine.connect() as connection:
+        results = check_query_plans(connection)
+    for result in results:
+        print(f"{'ok  ' if result['uses_index'] else 'FAIL'} {result['query']}: {', '.join(result['scans']) or 'no scan'}")
+    sys.exit(0 if all(result["uses_index"] for result in results) else 1)
@@ -0,0 +1,58 @@
+from collections import defaultdict
+from sqlmodel import Session, select
+from models import Race, Language, RacialTrait
+from services.catalog_cache import cached
+
+
+def _lookup_key(value):
+    # JSONB lists may hold ids or names; match names case-insensitively
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isdigit() else value.lower()
+    return value
+
+
+@cached("races", "languages", "racial_traits")
+def race_bundles(session: Session):
+    """
+    Builds every race's bundle up front, inverting Language.learned_by_races
+    into race -> learnable languages so a bundle is a single dict lookup.
+    """
+    races = session.exec(select(Race)).all()
+    languages = session.exec(select(Language)).all()
+    traits = session.exec(select(RacialTrait)).all()
+
+    languages_by_key = {}
+    for language in languages:
+        languages_by_key[language.id] = language
+        if language.name:
+            languages_by_key[language.name.strip().lower()] = language
+
+    race_ids_by_key = {}
+    for race in races:
+        race_ids_by_key[race.id] = race.id
+        if race.name:
+            race_ids_by_key[race.name.strip().lower()] = race.id
+
+    learnable = defaultdict(dict)
+    for language in languages:
+        for race_key in language.learned_by_races or []:
+            race_id = race_ids_by_key.get(_lookup_key(race_key))
+            if race_id is not None:
+                learnable[race_id][language.id] = language.model_dump()
+
+    traits_by_race = defaultdict(list)
+    for trait in traits:
+        if trait.race_id is not None:
+            traits_by_race[trait.race_id].append(trait.model_dump())
+
+    bundles = {}
+    for race in races:
+        starting = [languages_by_key.get(_lookup_key(key)) for key in race.starting_languages or []]
+        bundles[race.id] = {
+            "race": race.model_dump(),
+            "starting_languages": [language.model_dump() for language in starting if language is not None],
+            "learnable_languages": list(learnable[race.id].values()),
+            "racial_traits": traits_by_race[race.id],
+        }
+    return bundles
@@ -0,0 +1,191 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))  # distinct statements kept
+EXPLAIN_SAMPLE_RATE = float(os.getenv("EXPLAIN_SAMPLE_RATE", "0.2"))
+EXPLAIN_INTERVAL = float(os.getenv("EXPLAIN_INTERVAL", "300"))  # seconds between plans for one statement
+EXPLAIN_TIMEOUT_MS = int(os.getenv("EXPLAIN_TIMEOUT_MS", "10000"))
+MAX_ROUTES = 5  # routes remembered per statement
+
+# The ASGI scope of the request being served, for tagging queries with the
+# route. Starlette adds the matched route to the same scope dict, so by the
+# time a query runs the route template is there.
+_current_scope = contextvars.ContextVar("current_scope", default=None)
+
+
+def redact(value):
+    # Keep the shape of the parameters, not what's in them
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return f"<{type(value).__name__}>"
+
+
+def _route() -> str:
+    scope = _current_scope.get()
+    if scope is None:
+        return "(background)"
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+
+class SlowQueryLog:
+    """
+    Statements that took longer than SLOW_QUERY_MS, grouped by statement
+    text, with how often and how slowly they ran, the routes that ran them
+    and redacted parameters. A sample of them is re-run under EXPLAIN
+    (ANALYZE, BUFFERS) on a background thread, read-only and rolled back.
+    Only the SLOW_QUERY_LOG_SIZE statements with the most total time are kept.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, max_statements: int = SLOW_QUERY_LOG_SIZE):
+        self.threshold_ms = threshold_ms
+        self.max_statements = max_statements
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=20)
+        self._explain_thread = None
+        self._local = threading.local()
+
+    def record(self, connection, statement: str, parameters, duration_ms: float, executemany: bool):
+        if duration_ms < self.threshold_ms or getattr(self._local, "explaining", False):
+            return
+        route = _route()
+        with self._lock:
+            entry = self.entries.get(statement)
+            if entry is None:
+                if len(self.entries) >= self.max_statements:
+                    del self.entries[min(self.entries, key=lambda key: self.entries[key]["total_ms"])]
+                entry = self.entries[statement] = {
+                    "statement": statement,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": {},
+                    "parameters": None,
+                    "last_seen": None,
+                    "plan": None,
+                    "explained_at": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["last_seen"] = time.time()
+            if duration_ms >= entry["max_ms"]:
+                entry["max_ms"] = duration_ms
+                entry["parameters"] = redact(parameters)
+            if route in entry["routes"] or len(entry["routes"]) < MAX_ROUTES:
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+            explain = (
+                not executemany
+                and connection.dialect.name == "postgresql"
+                and statement.lstrip().upper().startswith(("SELECT", "WITH"))
+                and time.time() - (entry["explained_at"] or 0) > EXPLAIN_INTERVAL
+                and random.random() < EXPLAIN_SAMPLE_RATE
+            )
+            if explain:
+                entry["explained_at"] = time.time()
+        if explain:
+            self._queue_explain(connection.engine, statement, parameters)
+
+    def _queue_explain(self, engine, statement: str, parameters):
+        # The real parameters only live in the queue until the plan is taken
+        try:
+            self._explain_queue.put_nowait((engine, statement, parameters))
+        except queue.Full:
+            return
+        if self._explain_thread is None or not self._explain_thread.is_alive():
+            self._explain_thread = threading.Thread(target=self._explain_worker, name="slow-query-explain", daemon=True)
+            self._explain_thread.start()
+
+    def _explain_worker(self):
+        self._local.explaining = True
+        while True:
+            engine, statement, parameters = self._explain_queue.get()
+            try:
+                plan = self.explain(engine, statement, parameters)
+            except Exception as e:
+                plan = {"error": str(e)}
+            with self._lock:
+                entry = self.entries.get(statement)
+                if entry is not None:
+                    entry["plan"] = plan
+
+    @staticmethod
+    def explain(engine, statement: str, parameters):
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                # Read-only, so a SELECT that calls something with side
+                # effects fails instead of writing
+                connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                result = connection.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters or {})
+                plan = result.scalar()
+            finally:
+                transaction.rollback()
+        return json.loads(plan) if isinstance(plan, str) else plan
+
+    def worst(self, limit: int = 20, sort: str = "total_ms") -> list:
+        with self._lock:
+            entries = sorted(self.entries.values(), key=lambda entry: entry[sort], reverse=True)[:limit]
+            return [
+                {**entry, "mean_ms": round(entry["total_ms"] / entry["count"], 3), "routes": dict(entry["routes"])}
+                for entry in entries
+            ]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+slow_queries = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_slow_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    slow_queries.record(conn, statement, parameters, (time.perf_counter() - started) * 1000, executemany)
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+class QueryContextMiddleware:
+    # Makes the request's route available to the slow query log
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
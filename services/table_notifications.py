@@ -0,0 +1,98 @@
+import json
+import logging
+import select
+import threading
+from db import engine
+from services.catalog_cache import apply_versions, sync_versions
+from services.character_cache import apply_character_change, character_cache
+
+logger = logging.getLogger(__name__)
+
+TABLE_CHANNEL = "table_changes"
+CHARACTER_CHANNEL = "character_changes"
+POLL_INTERVAL = 5.0  # seconds between liveness checks on an idle connection
+MAX_RECONNECT_DELAY = 30.0
+
+
+class TableChangeListener:
+    """
+    Holds a dedicated connection LISTENing on 'table_changes' and
+    'character_changes'. Catalog notifications (sent by the
+    bump_table_version trigger on commit) are applied to this process's
+    table versions, character ones drop that character from the character
+    cache, so edits made anywhere show up here within milliseconds. After
+    every (re)connect it re-reads all versions and empties the character
+    cache, in case something changed while it wasn't listening; while it's
+    disconnected the character cache is bypassed.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if engine.dialect.name != "postgresql":
+            return
+        character_cache.enabled = False
+        self._thread = threading.Thread(target=self._run, name="table-change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _connect(self):
+        # Taken out of the pool for good; it spends its life waiting
+        pooled = engine.raw_connection()
+        connection = pooled.driver_connection
+        pooled.detach()
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {TABLE_CHANNEL}")
+            cursor.execute(f"LISTEN {CHARACTER_CHANNEL}")
+        return connection
+
+    def _run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with engine.connect() as sync_connection:
+                    sync_versions(sync_connection)
+                character_cache.invalidate_all()
+                character_cache.enabled = True
+                delay = 1.0
+                self._listen(connection)
+            except Exception as e:
+                character_cache.enabled = False
+                logger.warning("Table change listener disconnected, retrying in %ss: %s", delay, e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def _listen(self, connection):
+        while not self._stop.is_set():
+            if not select.select([connection], [], [], POLL_INTERVAL)[0]:
+                # Nothing for a while: make sure the connection is still there
+                # rather than waiting forever on a dead socket
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            connection.poll()
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                if notify.channel == CHARACTER_CHANNEL:
+                    apply_character_change(notify.payload)
+                else:
+                    self._apply_table_change(notify.payload)
+
+    def _apply_table_change(self, payload: str):
+        try:
+            change = json.loads(payload)
+            apply_versions({change["table"]: int(change["version"])})
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed table change notification: %r", payload)
+
+
+table_change_listener = TableChangeListener()
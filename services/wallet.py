@@ -0,0 +1,112 @@
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import update, func
+from sqlmodel import Session, select
+from models import Character, CharacterHolding, Equipment, Armor, Weapon, CharacterInventoryLink, CharacterWeaponLink, CharacterArmorLink
+
+# Coin values in copper pieces. Wallets are stored as a single integer number
+# of copper so balances never go through floating point.
+COIN_VALUES = {
+    "platinum": 1000,
+    "gold": 100,
+    "silver": 10,
+    "copper": 1,
+}
+
+# Shop item type -> (catalog model, link model, link column for the item)
+SHOP_ITEM_TYPES = {
+    "Equipment": (Equipment, CharacterInventoryLink, "equipment_id"),
+    "Weapon": (Weapon, CharacterWeaponLink, "weapon_id"),
+    "Armor": (Armor, CharacterArmorLink, "armor_id"),
+}
+
+
+class PurchaseError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def gold_to_copper(gold_value) -> int:
+    # str() first so 0.07 gold becomes exactly 7 copper, not 7.000000000000001
+    if gold_value is None:
+        return 0
+    copper = Decimal(str(gold_value)) * COIN_VALUES["gold"]
+    return int(copper.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def split_coins(copper: int) -> dict:
+    coins = {}
+    remaining = copper
+    for coin, value in COIN_VALUES.items():
+        coins[coin], remaining = divmod(remaining, value)
+    return coins
+
+
+def wallet_summary(character_id: int, copper: int) -> dict:
+    return {
+        "character_id": character_id,
+        "wallet_copper": copper,
+        "coins": split_coins(copper),
+    }
+
+
+def purchase_item(session: Session, character_id: int, user_id: str, item_type: str, item_id: int, quantity: int = 1):
+    """
+    Debits the character's wallet and adds the item to their links in one
+    transaction. Raises PurchaseError if anything about the purchase is invalid.
+    """
+    if item_type not in SHOP_ITEM_TYPES:
+        raise PurchaseError(400, f"Unknown item type '{item_type}'")
+    if quantity < 1:
+        raise PurchaseError(400, "Quantity must be at least 1")
+
+    item_model, link_model, item_column = SHOP_ITEM_TYPES[item_type]
+    item = session.exec(select(item_model.id, item_model.gold_value).where(item_model.id == item_id)).first()
+    if item is None:
+        raise PurchaseError(404, f"{item_type} not found")
+    cost = gold_to_copper(item.gold_value) * quantity
+
+    try:
+        # Conditional debit: the row lock it takes also serialises concurrent
+        # purchases for the same character until this transaction commits.
+        balance = session.execute(
+            update(Character)
+            .where(Character.id == character_id)
+            .where(Character.user_id == user_id)
+            .where(Character.wallet_copper >= cost)
+            .values(wallet_copper=Character.wallet_copper - cost)
+            .returning(Character.wallet_copper)
+        ).scalar()
+
+        if balance is None:
+            character = session.get(Character, character_id)
+            if not character:
+                raise PurchaseError(404, "Character not found")
+            if character.user_id != user_id:
+                raise PurchaseError(403, "You can only buy items for your own characters")
+            raise PurchaseError(400, "Not enough money")
+
+        holding = CharacterHolding.from_link(link_model(character_id=character_id, **{item_column: item_id}, quantity=quantity))
+        updated = session.execute(
+            update(CharacterHolding)
+            .where(CharacterHolding.character_id == character_id)
+            .where(CharacterHolding.kind == holding.kind)
+            .where(CharacterHolding.ref_id == item_id)
+            .values(quantity=func.coalesce(CharacterHolding.quantity, 1) + quantity)
+        ).rowcount
+        if not updated:
+            session.add(holding)
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return {
+        "item_type": item_type,
+        "item_id": item_id,
+        "quantity": quantity,
+        "cost_copper": cost,
+        **wallet_summary(character_id, balance),
+    }
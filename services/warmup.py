@@ -0,0 +1,139 @@
+import logging
+import os
+import time
+from sqlalchemy import text
+from sqlmodel import Session, select
+from db import engine
+from models import Character, CharacterClass, Race, Stat, Skill, Feat, Alignment, Equipment, Armor, Weapon, Spell, Language, RacialTrait, ClassAbility
+from services.ability_index import abilities_by_class
+from services.character_kit import kit_catalog_index
+from services.feat_graph import feat_graph
+from services.progression import bab_table, save_table, spell_slot_table, stat_keys
+from services.race_index import race_bundles
+from services.catalog_snapshot import catalog_manifest
+from services.catalog_cache import sync_versions
+
+logger = logging.getLogger(__name__)
+
+# Every cached catalog structure, built up front instead of on first request
+CATALOG_LOADERS = [
+    kit_catalog_index,
+    race_bundles,
+    feat_graph,
+    abilities_by_class,
+    bab_table,
+    save_table,
+    spell_slot_table,
+    stat_keys,
+    catalog_manifest,
+]
+
+# The statements behind the busiest endpoints. Running them once puts their
+# compiled form in SQLAlchemy's statement cache; the bound values don't
+# matter, only the statement shape does.
+HOT_STATEMENTS = [
+    select(CharacterClass),
+    select(Race),
+    select(Stat),
+    select(Skill),
+    select(Feat),
+    select(Alignment),
+    select(Equipment),
+    select(Armor),
+    select(Weapon),
+    select(Spell),
+    select(Language),
+    select(RacialTrait),
+    select(ClassAbility),
+    select(Character).where(Character.user_id == ""),
+    select(Character).where(Character.id == 0),
+]
+
+WARM_CONNECTIONS = int(os.getenv("WARM_CONNECTIONS", "5"))
+
+# What the last warm-up managed to do, for the readiness check
+warm_state = {
+    "ready": False,
+    "pool": False,
+    "statements": False,
+    "versions": False,
+    "catalog": False,
+    "openapi": False,
+    "seconds": None,
+}
+
+
+def warm_catalog_caches() -> bool:
+    """
+    Builds every catalog cache. Returns False (and leaves the caches to be
+    built lazily) if the database can't be reached.
+    """
+    try:
+        with Session(engine) as session:
+            for loader in CATALOG_LOADERS:
+                loader(session)
+        return True
+    except Exception:
+        logger.exception("Could not warm catalog caches")
+        return False
+
+
+def sync_table_versions() -> bool:
+    try:
+        with engine.connect() as connection:
+            return sync_versions(connection)
+    except Exception:
+        logger.exception("Could not sync table versions")
+        return False
+
+
+def prime_pool(count: int = WARM_CONNECTIONS) -> bool:
+    # Hold `count` connections open at once so the pool really opens that
+    # many (TCP + TLS + auth) instead of reusing the first one
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        logger.exception("Could not open database connections")
+        return False
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def compile_hot_statements() -> bool:
+    try:
+        with Session(engine) as session:
+            for statement in HOT_STATEMENTS:
+                # A server-side cursor that's closed straight away, so the
+                # statement is compiled and cached without fetching the
+                # tables' rows. LIMIT 0 would cache a different statement.
+                session.exec(statement, execution_options={"stream_results": True}).close()
+        return True
+    except Exception:
+        logger.exception("Could not pre-run hot statements")
+        return False
+
+
+def warm_up(app) -> dict:
+    """
+    Everything a cold process would otherwise do on its first requests.
+    Failures are logged and skipped; whatever didn't warm happens lazily.
+    """
+    started = time.perf_counter()
+    warm_state["pool"] = prime_pool()
+    warm_state["statements"] = warm_state["pool"] and compile_hot_statements()
+    # Pick up the current table versions first, so the catalog can be filled
+    # from the shared cache if another machine has already built it
+    warm_state["versions"] = warm_state["pool"] and sync_table_versions()
+    warm_state["catalog"] = warm_state["pool"] and warm_catalog_caches()
+    app.openapi()
+    warm_state["openapi"] = True
+    warm_state["seconds"] = round(time.perf_counter() - started, 3)
+    warm_state["ready"] = warm_state["pool"] and warm_state["catalog"]
+    logger.info("Warm-up finished: %s", warm_state)
+    return warm_state
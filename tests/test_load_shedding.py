@@ -0,0 +1,58 @@
+import random
+
+from services.load_shedding import AdaptiveLimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limit_holds_under_mixed_traffic_below_capacity():
+    # 100 requests a second, one at a time: half 2 ms catalog hits, half 30 ms writes
+    clock = FakeClock()
+    limit = AdaptiveLimit(initial=10, clock=clock)
+    rng = random.Random(1)
+    for _ in range(6000):
+        clock.now += 0.01
+        if rng.random() < 0.5:
+            limit.record(rng.uniform(0.0018, 0.0025), route="catalog", in_flight=1)
+        else:
+            limit.record(rng.uniform(0.025, 0.035), route="write", in_flight=1)
+    assert limit.limit == 10
+
+
+def test_limit_grows_while_in_use_and_fast():
+    clock = FakeClock()
+    limit = AdaptiveLimit(initial=10, maximum=40, clock=clock)
+    for _ in range(2000):
+        clock.now += 0.01
+        limit.record(0.002, route="catalog", in_flight=int(limit.limit))
+    assert limit.limit > 30
+
+
+def test_limit_backs_off_when_latency_climbs():
+    clock = FakeClock()
+    limit = AdaptiveLimit(initial=20, clock=clock)
+    for _ in range(500):
+        clock.now += 0.01
+        limit.record(0.002, route="catalog", in_flight=5)
+        limit.record(0.030, route="write", in_flight=5)
+    # Everything slows down fivefold for three seconds: cut once per window
+    for _ in range(300):
+        clock.now += 0.01
+        limit.record(0.010, route="catalog", in_flight=20)
+        limit.record(0.150, route="write", in_flight=20)
+    assert limit.limit < 20 * 0.9 ** 5
+
+
+def test_decreases_at_most_once_per_window():
+    clock = FakeClock()
+    limit = AdaptiveLimit(initial=10, window=0.5, clock=clock)
+    for _ in range(10):
+        clock.now += 0.01
+        limit.record(0.01, failed=True, route="write")
+    assert limit.limit == 9